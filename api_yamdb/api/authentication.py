@@ -0,0 +1,98 @@
+from time import time
+
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.cache import USERS_VERSION_KEY, get_version
+from reviews.constants import AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_TIMEOUT
+from reviews.models import User
+from reviews.user_cache import LRUCache
+
+AUTH_VERSION_CLAIM = 'auth_version'
+USER_CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+
+
+def get_user_claims(user):
+    return {
+        api_settings.USER_ID_CLAIM: getattr(
+            user, api_settings.USER_ID_FIELD
+        ),
+        **{claim: getattr(user, claim) for claim in USER_CLAIMS}
+    }
+
+
+class RoleAccessToken(AccessToken):
+    """Токен доступа с ролью пользователя и версией прав пользователей на
+    момент выдачи.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, value in get_user_claims(user).items():
+            token[claim] = value
+        token[AUTH_VERSION_CLAIM] = get_version(USERS_VERSION_KEY)
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    """Пользователь запроса, собранный из утверждений токена, — без модели
+    User и запроса к БД.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', User.USER)
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+    @property
+    def is_admin(self):
+        return self.role == User.ADMIN or self.is_staff or self.is_superuser
+
+
+# Утверждения хранятся вместе с версией прав, с которой они прочитаны.
+# Версия общая для всех пользователей: изменение прав любого из них
+# сбрасывает кеш, и каждый активный пользователь читается из БД один раз.
+user_claims_cache = LRUCache(AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_TIMEOUT)
+
+
+def is_claims_fresh(token):
+    return time() - token.get('iat', 0) < AUTH_USER_CACHE_TIMEOUT
+
+
+class RoleJWTAuthentication(JWTAuthentication):
+    """Доверяет ролям из подписанного токена, пока версия прав пользователей
+    в общем кеше версий совпадает с версией в токене, но не дольше
+    AUTH_USER_CACHE_TIMEOUT после выдачи. Иначе, и для токенов без ролей,
+    пользователь читается из БД не чаще раза в AUTH_USER_CACHE_TIMEOUT.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        version = get_version(USERS_VERSION_KEY)
+        if (validated_token.get(AUTH_VERSION_CLAIM) == version
+                and is_claims_fresh(validated_token)):
+            return RoleTokenUser(validated_token)
+        entry = user_claims_cache.get(user_id)
+        if entry is not None and entry[0] == version:
+            return RoleTokenUser(entry[1])
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).only(api_settings.USER_ID_FIELD, 'is_active', *USER_CLAIMS).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(
+                'Пользователь не найден или неактивен.',
+                code='user_not_found'
+            )
+        claims = get_user_claims(user)
+        user_claims_cache.set(user_id, (version, claims))
+        return RoleTokenUser(claims)
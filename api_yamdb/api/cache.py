@@ -0,0 +1,46 @@
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+
+from reviews.cache import get_catalog_version
+
+TITLE_LIST_CACHE_PARAMS = (
+    'category', 'genre', 'name', 'search', 'year', 'limit', 'offset',
+    'cursor', 'fields'
+)
+TITLE_LIST_CACHE_HITS_KEY = 'titles:list:hits'
+TITLE_LIST_CACHE_MISSES_KEY = 'titles:list:misses'
+
+
+def get_title_list_cache_key(request):
+    params = sorted(
+        (param, value)
+        for param in TITLE_LIST_CACHE_PARAMS
+        for value in request.query_params.getlist(param)
+        if value or param == 'cursor'
+    )
+    digest = md5(
+        f'{request.get_host()}?{urlencode(params)}'.encode()
+    ).hexdigest()
+    return f'titles:list:{get_catalog_version()}:{digest}'
+
+
+def count_title_list_cache_access(hit):
+    key = TITLE_LIST_CACHE_HITS_KEY if hit else TITLE_LIST_CACHE_MISSES_KEY
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_title_list_cache_stats():
+    stats = cache.get_many(
+        (TITLE_LIST_CACHE_HITS_KEY, TITLE_LIST_CACHE_MISSES_KEY)
+    )
+    return {
+        'hits': stats.get(TITLE_LIST_CACHE_HITS_KEY, 0),
+        'misses': stats.get(TITLE_LIST_CACHE_MISSES_KEY, 0),
+        'version': get_catalog_version(),
+    }
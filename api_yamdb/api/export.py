@@ -0,0 +1,48 @@
+import json
+from itertools import islice
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from api.serializers import CommentSerializer, ReviewSerializer
+from reviews.constants import EXPORT_CHUNK_SIZE
+from reviews.models import Comment
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def to_ndjson_line(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+
+def iter_chunks(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def iter_reviews_ndjson(reviews, with_comments=False,
+                        chunk_size=EXPORT_CHUNK_SIZE):
+    """Отзывы построчно в NDJSON: в памяти одновременно не больше одного
+    блока из chunk_size отзывов и их комментариев.
+    """
+    reviews_serializer = ReviewSerializer(many=True)
+    comments_serializer = CommentSerializer(many=True)
+    for chunk in iter_chunks(reviews.iterator(chunk_size), chunk_size):
+        comments = {}
+        if with_comments:
+            chunk_comments = list(Comment.objects.filter(
+                review_id__in=[review.pk for review in chunk]
+            ).order_by('review_id', '-pub_date', '-id'))
+            for comment, data in zip(
+                chunk_comments,
+                comments_serializer.to_representation(chunk_comments)
+            ):
+                comments.setdefault(comment.review_id, []).append(data)
+        for review, data in zip(
+            chunk, reviews_serializer.to_representation(chunk)
+        ):
+            if with_comments:
+                data['comments'] = comments.get(review.pk, [])
+            yield to_ndjson_line(data)
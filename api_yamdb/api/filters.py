@@ -1,6 +1,8 @@
 import django_filters as filters
+from rest_framework.filters import SearchFilter
 
 from reviews.models import Category, Genre, Title
+from reviews.search import search_titles, search_users
 
 
 class TitleFilter(filters.FilterSet):
@@ -17,7 +19,30 @@ class TitleFilter(filters.FilterSet):
     name = filters.CharFilter(
         lookup_expr='icontains'
     )
+    search = filters.CharFilter(
+        method='filter_search'
+    )
 
     class Meta:
         model = Title
-        fields = ['genre', 'category', 'year', 'name']
+        fields = ['genre', 'category', 'year', 'name', 'search']
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class UserSearchFilter(SearchFilter):
+    """Поиск по подстроке имени пользователя; search_mode=prefix ищет по
+    началу имени по обычному индексу.
+    """
+
+    search_mode_param = 'search_mode'
+
+    def filter_queryset(self, request, queryset, view):
+        return search_users(
+            queryset,
+            request.query_params.get(self.search_param, ''),
+            prefix=(
+                request.query_params.get(self.search_mode_param) == 'prefix'
+            )
+        )
@@ -1,16 +1,199 @@
+from hashlib import md5
+
+from django.core.cache import cache
+from django.db.models import F
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework import filters, mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotAuthenticated, ValidationError
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
 
+from api.cache import (
+    count_title_list_cache_access, get_title_list_cache_key
+)
+from api.pagination import PubDateCursorPagination
 from api.permissions import (
     AdminOrReadOnlyPermission,
     AuthorModeratorAdminPermission
 )
+from api.serializers import RankingSerializer
+from reviews.models import User
+from reviews.cache import get_version
+from reviews.constants import (
+    LEADERBOARD_MAX_SIZE, PAGE_SIZE, TITLE_LIST_CACHE_TIMEOUT
+)
+
+
+class OptionalCursorPaginationMixin:
+    cursor_pagination_class = None
+
+    @property
+    def paginator(self):
+        if (
+            not hasattr(self, '_paginator')
+            and self.cursor_pagination_class.cursor_query_param
+            in self.request.query_params
+        ):
+            self.check_cursor_ordering()
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
+
+    def check_cursor_ordering(self):
+        # Курсор задаёт собственный порядок строк: сортировка из запроса
+        # молча не применялась бы.
+        for backend in self.filter_backends:
+            if (
+                issubclass(backend, filters.OrderingFilter)
+                and backend.ordering_param in self.request.query_params
+            ):
+                raise ValidationError({backend.ordering_param: (
+                    'Не используется вместе с параметром '
+                    f'{self.cursor_pagination_class.cursor_query_param}.'
+                )})
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified по версиям данных: общим версиям из кеша
+    версий (version_keys) и версиям из строк БД родителя списка или
+    объекта.
+
+    Ответ 304 отдаётся только после проверки, что объект или родитель
+    списка существует и виден.
+    """
+
+    version_keys = ()
+
+    def get_list_versions(self):
+        return ()
+
+    def get_object_versions(self):
+        return ()
+
+    def check_list_exists(self):
+        pass
+
+    def check_object_exists(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if not self.get_queryset().filter(**{
+            self.lookup_field: self.kwargs[lookup_url_kwarg]
+        }).exists():
+            raise Http404
+
+    def get_validators(self, request, versions):
+        etag = quote_etag(md5(
+            f'{versions}:{request.accepted_renderer.format}:'
+            f'{request.get_full_path()}'.encode()
+        ).hexdigest())
+        return etag, max(versions) // 10 ** 9
+
+    def set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get_conditional_response(self, handler, get_versions, check_exists,
+                                 request, *args, **kwargs):
+        # Версии читаются до данных: ответ не может оказаться старше ETag.
+        versions = [*get_versions(), *map(get_version, self.version_keys)]
+        etag, last_modified = self.get_validators(request, versions)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        else:
+            check_exists()
+        return self.set_validators(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, self.get_list_versions, self.check_list_exists,
+            request, *args, **kwargs
+        )
 
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, self.get_object_versions,
+            self.check_object_exists, request, *args, **kwargs
+        )
 
-class ReviewCommentMixin(viewsets.ModelViewSet):
+
+class CachedTitleListMixin:
+
+    def list(self, request, *args, **kwargs):
+        cache_key = get_title_list_cache_key(request)
+        data = cache.get(cache_key)
+        count_title_list_cache_access(hit=data is not None)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        cache.set(cache_key, response.data, TITLE_LIST_CACHE_TIMEOUT)
+        return response
+
+
+class ReviewCommentMixin(
+    OptionalCursorPaginationMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet
+):
     permission_classes = (AuthorModeratorAdminPermission,
                           IsAuthenticatedOrReadOnly)
     http_method_names = ['get', 'post', 'patch', 'delete']
+    cursor_pagination_class = PubDateCursorPagination
+    parent_model = None
+    # Поле родителя и аргумент URL, по которому оно ищется.
+    parent_lookup_kwargs = {}
+    # Внешний ключ на родителя и поле родителя с версией списка.
+    parent_field = None
+    parent_version_field = None
+
+    def get_parent_lookup(self):
+        return {
+            field: self.kwargs.get(kwarg)
+            for field, kwarg in self.parent_lookup_kwargs.items()
+        }
+
+    def get_parent(self):
+        if not hasattr(self, '_parent'):
+            self._parent = get_object_or_404(
+                self.parent_model, **self.get_parent_lookup()
+            )
+        return self._parent
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.detail:
+            # Объект читается вместе с версией родителя одним запросом.
+            queryset = queryset.annotate(parent_version=F(
+                f'{self.parent_field}__{self.parent_version_field}'
+            ))
+        return queryset
+
+    def get_object(self):
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+    # Версия списка читается вместе с родителем, версия объекта — вместе
+    # с ним самим, так что их существование уже проверено.
+
+    def get_list_versions(self):
+        return (getattr(self.get_parent(), self.parent_version_field),)
+
+    def get_object_versions(self):
+        return (self.get_object().parent_version,)
+
+    def check_list_exists(self):
+        pass
+
+    def check_object_exists(self):
+        pass
 
 
 class GenreCategoryMixin(
@@ -23,3 +206,34 @@ class GenreCategoryMixin(
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+
+    @action(methods=('GET',), detail=True, url_path='top')
+    def top(self, request, slug=None):
+        try:
+            limit = int(request.query_params.get('limit', PAGE_SIZE))
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается целое число.'})
+        if not 0 < limit <= LEADERBOARD_MAX_SIZE:
+            raise ValidationError(
+                {'limit': f'Допустимо от 1 до {LEADERBOARD_MAX_SIZE}.'}
+            )
+        rankings = self.get_object().rankings.select_related(
+            'title__category'
+        ).prefetch_related('title__genre')[:limit]
+        return Response(RankingSerializer(rankings, many=True).data)
+
+
+class UserActivityMixin(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Отзывы или комментарии одного автора, новые первыми; `me` —
+    текущий пользователь.
+    """
+
+    pagination_class = PubDateCursorPagination
+
+    def get_author(self):
+        username = self.kwargs.get('username')
+        if username != 'me':
+            return get_object_or_404(User, username=username)
+        if not self.request.user.is_authenticated:
+            raise NotAuthenticated
+        return self.request.user
@@ -0,0 +1,181 @@
+from datetime import datetime
+
+from django.db.models import Q, prefetch_related_objects
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """Keyset-пагинация без COUNT и OFFSET: следующая страница выбирается
+    условием по значениям последней строки предыдущей.
+
+    Строки упорядочены по (ключ, id), оба по убыванию; ключ — первое поле
+    ordering. Подклассы задают ordering и, если ключ не строка, его
+    разбор и запись в курсоре.
+
+    Включается параметром `cursor` (для первой страницы — пустым), без
+    него остаётся обычная LimitOffsetPagination.
+    """
+
+    page_size_query_param = 'limit'
+
+    @property
+    def key_field(self):
+        return self.ordering[0].lstrip('-')
+
+    def parse_key(self, value):
+        return value
+
+    def encode_key(self, value):
+        return str(value)
+
+    def order_queryset(self, queryset, reverse=False):
+        if reverse:
+            return queryset.order_by(self.key_field, 'id')
+        return queryset.order_by(f'-{self.key_field}', '-id')
+
+    def get_keyset_filter(self, key, pk, reverse=False):
+        # Условие по одному ключу задаёт диапазон индекса, остальное
+        # проверяется внутри него.
+        lookup = 'gt' if reverse else 'lt'
+        return Q(**{f'{self.key_field}__{lookup}e': key}) & (
+            Q(**{f'{self.key_field}__{lookup}': key})
+            | Q(**{f'id__{lookup}': pk})
+        )
+
+    def parse_position(self, position):
+        key, pk = position.rsplit(':', 1)
+        return (self.parse_key(key) if key else None), int(pk)
+
+    def encode_position(self, instance):
+        key = getattr(instance, self.key_field)
+        key = '' if key is None else self.encode_key(key)
+        return f'{key}:{instance.pk}'
+
+    def get_segments(self, queryset, position, reverse=False):
+        """Части выборки в порядке вывода; каждая читается отдельным
+        запросом по индексу, следующая — только если страница не набрана.
+        """
+        queryset = self.order_queryset(queryset, reverse=reverse)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(
+                *position, reverse=reverse
+            ))
+        return [queryset]
+
+    def get_results(self, queryset, position, reverse=False):
+        segments = self.get_segments(queryset, position, reverse=reverse)
+        if len(segments) == 1:
+            return list(segments[0][:self.page_size + 1])
+        results = []
+        for segment in segments:
+            results.extend(
+                segment.prefetch_related(None)[
+                    :self.page_size + 1 - len(results)
+                ]
+            )
+            if len(results) > self.page_size:
+                break
+        # Связанные объекты догружаются одним запросом на всю страницу,
+        # а не на каждую её часть.
+        prefetch_related_objects(
+            results, *queryset._prefetch_related_lookups
+        )
+        return results
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.decode_position(self.cursor)
+
+        results = self.get_results(queryset, position, reverse=reverse)
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def decode_position(self, cursor):
+        if cursor is None or cursor.position is None:
+            return None
+        try:
+            return self.parse_position(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=False,
+            position=self.encode_position(self.page[-1])
+        ))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=True,
+            position=self.encode_position(self.page[0])
+        ))
+
+
+class RatingCursorPagination(KeysetCursorPagination):
+    """По (rating, id): рейтинг по убыванию, без оценок в конце, при равном
+    рейтинге — по убыванию id.
+
+    Произведения с оценками и без них выбираются отдельными запросами:
+    условие с rating IS NULL через OR не сводится к поиску диапазона
+    по индексу title_rating_id_idx, и глубокие страницы читали бы индекс
+    с начала.
+    """
+
+    ordering = ('-rating', '-id')
+
+    def parse_key(self, value):
+        return float(value)
+
+    def encode_key(self, value):
+        return repr(value)
+
+    def get_segments(self, queryset, position, reverse=False):
+        rated = self.order_queryset(
+            queryset.filter(rating__isnull=False), reverse=reverse
+        )
+        unrated = queryset.filter(rating__isnull=True).order_by(
+            'id' if reverse else '-id'
+        )
+        if position is None:
+            return [unrated, rated] if reverse else [rated, unrated]
+        rating, pk = position
+        if rating is None:
+            if reverse:
+                return [unrated.filter(id__gt=pk), rated]
+            return [unrated.filter(id__lt=pk)]
+        rated = rated.filter(
+            self.get_keyset_filter(rating, pk, reverse=reverse)
+        )
+        return [rated] if reverse else [rated, unrated]
+
+
+class PubDateCursorPagination(KeysetCursorPagination):
+    """По (pub_date, id) — оба по убыванию, как индексы отзывов
+    и комментариев внутри родителя.
+    """
+
+    ordering = ('-pub_date', '-id')
+
+    def parse_key(self, value):
+        return datetime.fromisoformat(value)
+
+    def encode_key(self, value):
+        return value.isoformat()
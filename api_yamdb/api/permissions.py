@@ -15,6 +15,14 @@ class AdminOrReadOnlyPermission(AdminPermission):
                 or permission)
 
 
+class ModeratorPermission(permissions.BasePermission):
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            request.user.is_admin or request.user.is_moderator
+        )
+
+
 class AuthorModeratorAdminPermission(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
@@ -22,5 +30,5 @@ class AuthorModeratorAdminPermission(permissions.BasePermission):
             request.method in permissions.SAFE_METHODS
             or request.user.is_admin
             or request.user.is_moderator
-            or obj.author == request.user
+            or obj.author_id == request.user.id
         )
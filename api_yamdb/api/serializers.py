@@ -1,20 +1,69 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
+from django.db import IntegrityError, connection, models, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueValidator
 
+from api.authentication import RoleAccessToken
+from api.utils import get_requested_fields
+from reviews.cache import bump_catalog_version_on_commit
 from reviews.constants import (
+    MODERATION_MAX_IDS,
     NAME_MAX_LENGTH_LIMIT,
     EMAIL_MAX_LENGTH_LIMIT
 )
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import (
+    Category, Comment, Genre, Review, ScoreHistogram, Title
+)
+from reviews.signals import suspend_denormalized_updates
+from reviews.user_cache import user_cache
 from reviews.validators import validate_username, validate_email
 
 
 User = get_user_model()
 
 
+class SparseFieldsetMixin:
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = get_requested_fields(self.context.get('request'))
+        if fields is not None:
+            for field_name in set(self.fields) - fields:
+                self.fields.pop(field_name)
+
+
+class CachedAuthorListSerializer(serializers.ListSerializer):
+    # Авторы всей страницы берутся из кеша пользователей одним обращением.
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.Manager) else data)
+        self.authors = (
+            user_cache.get_many(item.author_id for item in items)
+            if 'author' in self.child.fields else {}
+        )
+        return super().to_representation(items)
+
+
+class CachedAuthorField(serializers.Field):
+    """Имя автора по author_id из кеша пользователей — без JOIN и без
+    загрузки строки пользователя.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'author_id')
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, author_id):
+        author = getattr(self.root, 'authors', {}).get(author_id)
+        if author is None:
+            author = user_cache.get(author_id)
+        return author.username if author is not None else None
+
+
 class GetTokenSerializer(serializers.Serializer):
     username = serializers.CharField(required=True)
     confirmation_code = serializers.CharField(required=True)
@@ -36,9 +85,7 @@ class GetTokenSerializer(serializers.Serializer):
                 {'confirmation_code': 'Неверный код подтверждения'}
             )
         else:
-            validated_data['token'] = (
-                default_token_generator.make_token(user)
-            )
+            validated_data['token'] = str(RoleAccessToken.for_user(user))
             return validated_data
 
 
@@ -64,13 +111,13 @@ class UserSerializer(serializers.ModelSerializer):
     username = serializers.CharField(
         required=True,
         validators=(UniqueValidator(
-            queryset=User.objects.all()),
+            queryset=User.all_objects.all()),
         )
     )
     email = serializers.EmailField(
         required=True,
         validators=(UniqueValidator(
-            queryset=User.objects.all()),
+            queryset=User.all_objects.all()),
         )
     )
 
@@ -92,7 +139,7 @@ class UserSerializer(serializers.ModelSerializer):
         return validate_email(value)
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category = serializers.SlugRelatedField(
         slug_field='slug',
         queryset=Category.objects.all()
@@ -110,23 +157,175 @@ class TitleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
+        )
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation['category'] = {
-            'name': instance.category.name,
-            'slug': instance.category.slug
-        }
-        representation['genre'] = [
-            {
-                'name': genre.name,
-                'slug': genre.slug
-            } for genre in instance.genre.all()
-        ]
+        if 'category' in representation:
+            representation['category'] = {
+                'name': instance.category.name,
+                'slug': instance.category.slug
+            }
+        if 'genre' in representation:
+            representation['genre'] = [
+                {
+                    'name': genre.name,
+                    'slug': genre.slug
+                } for genre in instance.genre.all()
+            ]
         return representation
 
 
+class TitleBulkListSerializer(serializers.ListSerializer):
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        errors = [{} for _ in items]
+        if self.partial:
+            self.resolve_titles(items, errors)
+        self.resolve_slugs(items, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def resolve_titles(self, items, errors):
+        titles = self.instance.in_bulk(
+            [item['id'] for item in items if 'id' in item]
+        )
+        seen_ids = set()
+        for item, item_errors in zip(items, errors):
+            if item.get('id') not in titles:
+                item_errors['id'] = ['Произведение не найдено.']
+            elif item['id'] in seen_ids:
+                item_errors['id'] = ['Произведение указано дважды.']
+            else:
+                seen_ids.add(item['id'])
+                item['title'] = titles[item['id']]
+
+    def resolve_slugs(self, items, errors):
+        categories = Category.objects.in_bulk(
+            {item['category'] for item in items if 'category' in item},
+            field_name='slug'
+        )
+        genres = Genre.objects.in_bulk(
+            {slug for item in items for slug in item.get('genre', ())},
+            field_name='slug'
+        )
+        for item, item_errors in zip(items, errors):
+            if 'category' in item:
+                if item['category'] in categories:
+                    item['category'] = categories[item['category']]
+                else:
+                    item_errors['category'] = ['Категория не найдена.']
+            missing_genres = [
+                slug for slug in item.get('genre', ()) if slug not in genres
+            ]
+            if missing_genres:
+                item_errors['genre'] = [
+                    f'Жанр {slug} не найден.' for slug in missing_genres
+                ]
+            elif 'genre' in item:
+                item['genre'] = [genres[slug] for slug in item['genre']]
+
+    @staticmethod
+    def insert_titles(titles):
+        if connection.features.can_return_rows_from_bulk_insert:
+            return Title.objects.bulk_create(titles)
+        if connection.vendor == 'sqlite':
+            # Без RETURNING (SQLite в Django 3.2) ключи берутся из
+            # last_insert_rowid(): строки одной вставки в таблицу с
+            # AUTOINCREMENT под блокировкой записи получают ключи подряд,
+            # поэтому каждая порция вставляется отдельным INSERT.
+            batch_size = connection.ops.bulk_batch_size([
+                field for field in Title._meta.concrete_fields
+                if not field.primary_key
+            ], titles)
+            with connection.cursor() as cursor:
+                for start in range(0, len(titles), batch_size):
+                    batch = titles[start:start + batch_size]
+                    Title.objects.bulk_create(batch)
+                    cursor.execute('SELECT last_insert_rowid()')
+                    last, = cursor.fetchone()
+                    for pk, title in zip(
+                        range(last - len(batch) + 1, last + 1), batch
+                    ):
+                        title.pk = pk
+            return titles
+        # Как и при загрузке фикстур (raw), обработчики сигналов не создают
+        # распределения оценок — это делает create.
+        for title in titles:
+            title.save_base(raw=True, force_insert=True)
+        return titles
+
+    def create(self, validated_data):
+        with transaction.atomic(), suspend_denormalized_updates():
+            titles = self.insert_titles([
+                Title(**{
+                    field: value for field, value in item.items()
+                    if field not in ('id', 'genre')
+                }) for item in validated_data
+            ])
+            Title.genre.through.objects.bulk_create(
+                Title.genre.through(title_id=title.pk, genre_id=genre.pk)
+                for title, item in zip(titles, validated_data)
+                for genre in item['genre']
+            )
+            ScoreHistogram.objects.bulk_create(
+                ScoreHistogram(title_id=title.pk) for title in titles
+            )
+            bump_catalog_version_on_commit()
+        return titles
+
+    def update(self, instance, validated_data):
+        titles = []
+        fields = set()
+        title_genres = {}
+        for item in validated_data:
+            title = item.pop('title')
+            item.pop('id')
+            genres = item.pop('genre', None)
+            if genres is not None:
+                title_genres[title.pk] = genres
+            for field, value in item.items():
+                setattr(title, field, value)
+            fields.update(item)
+            titles.append(title)
+        with transaction.atomic():
+            if fields:
+                Title.objects.bulk_update(titles, fields)
+            if title_genres:
+                Title.genre.through.objects.filter(
+                    title_id__in=title_genres
+                ).delete()
+                Title.genre.through.objects.bulk_create(
+                    Title.genre.through(title_id=pk, genre_id=genre.pk)
+                    for pk, genres in title_genres.items()
+                    for genre in genres
+                )
+            if 'category' in fields or title_genres:
+                Title.objects.filter(
+                    pk__in=[title.pk for title in titles]
+                ).refresh_rankings()
+            bump_catalog_version_on_commit()
+        return titles
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    category = serializers.SlugField()
+    genre = serializers.ListField(
+        child=serializers.SlugField(),
+        allow_empty=False
+    )
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category')
+        list_serializer_class = TitleBulkListSerializer
+
+
 class CategorySerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -141,35 +340,110 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
-    author = serializers.SlugRelatedField(
-        slug_field='username',
-        read_only=True
-    )
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    author = CachedAuthorField()
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
+        list_serializer_class = CachedAuthorListSerializer
+        fields = (
+            'id', 'text', 'author', 'score', 'pub_date', 'comment_count',
+            'last_comment_at'
+        )
 
-    def validate(self, data):
-        if self.context.get('request').method == 'POST':
-            if Review.objects.filter(
-                author=self.context['request'].user,
-                title_id=self.context['view'].kwargs.get('title_id')
+    def create(self, validated_data):
+        # Повторный отзыв отсекает ограничение unique_title_author в БД:
+        # без предварительной проверки и без гонки между запросами. Отзыв
+        # автора ищется только после ошибки, чтобы не выдать за повтор
+        # другие нарушения целостности.
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                title=validated_data.get('title'),
+                author_id=validated_data.get('author_id')
             ).exists():
-                raise serializers.ValidationError(
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
                     'Вы не можете создать более одного отзыва '
                     'на одно и то же произведение'
-                )
-        return data
+                ]
+            })
 
 
-class CommentSerializer(serializers.ModelSerializer):
-    author = serializers.SlugRelatedField(
-        read_only=True,
-        slug_field='username'
-    )
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    author = CachedAuthorField()
 
     class Meta:
         model = Comment
+        list_serializer_class = CachedAuthorListSerializer
         fields = ('id', 'text', 'author', 'pub_date')
+
+
+class TitleBriefSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name')
+
+
+class UserReviewSerializer(ReviewSerializer):
+    title = TitleBriefSerializer(read_only=True)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('title',)
+
+
+class UserCommentSerializer(CommentSerializer):
+    review = serializers.PrimaryKeyRelatedField(read_only=True)
+    title = TitleBriefSerializer(source='review.title', read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ('review', 'title')
+
+
+class ModerationSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MODERATION_MAX_IDS,
+        required=False
+    )
+    author = serializers.SlugRelatedField(
+        slug_field='username',
+        queryset=User.objects.all(),
+        required=False
+    )
+
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError(
+                'Укажите список `ids` и/или автора `author`.'
+            )
+        return data
+
+    def filter_queryset(self, queryset):
+        if 'ids' in self.validated_data:
+            queryset = queryset.filter(pk__in=self.validated_data['ids'])
+        if 'author' in self.validated_data:
+            queryset = queryset.filter(author=self.validated_data['author'])
+        return queryset
+
+
+class RankingSerializer(serializers.Serializer):
+    weighted_rating = serializers.FloatField(read_only=True)
+    title = TitleSerializer(read_only=True)
+
+
+class ScoreHistogramSerializer(serializers.ModelSerializer):
+    scores = serializers.DictField(
+        source='get_counts',
+        child=serializers.IntegerField(),
+        read_only=True
+    )
+
+    class Meta:
+        model = ScoreHistogram
+        fields = ('title', 'scores')
@@ -0,0 +1,95 @@
+from hashlib import sha256
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """Ограничение частоты запросов скользящим окном поверх кеша Django.
+
+    Счётчики текущего и предыдущего окна увеличиваются атомарным incr,
+    поэтому ограничение одинаково работает с locmem и с общим для всех
+    процессов кешем (Memcached, Redis). Отклонённые запросы тоже
+    учитываются: поток запросов остаётся заблокированным, пока не стихнет.
+    """
+
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def get_rate(self):
+        # Ставки читаются при каждом создании, чтобы их можно было менять
+        # через настройки без перезапуска импорта.
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_idents(self, request, view):
+        return [self.get_ident(request)]
+
+    def get_cache_key(self, request, view):
+        return None
+
+    def hit(self, key, window):
+        window_key = f'{key}:{window}'
+        self.cache.add(window_key, 0, self.duration * 2)
+        try:
+            return self.cache.incr(window_key)
+        except ValueError:
+            # Счётчик истёк между add и incr.
+            self.cache.set(window_key, 1, self.duration * 2)
+            return 1
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.now = self.timer()
+        window, elapsed = divmod(self.now, self.duration)
+        self.remaining = self.duration - elapsed
+        self.wait_time = None
+        for ident in self.get_idents(request, view):
+            key = self.cache_format % {'scope': self.scope, 'ident': ident}
+            current = self.hit(key, int(window))
+            previous = self.cache.get(f'{key}:{int(window) - 1}', 0)
+            weight = self.remaining / self.duration
+            if current + previous * weight > self.num_requests:
+                self.wait_time = self.get_wait_time(current, previous)
+                return False
+        return True
+
+    def get_wait_time(self, current, previous):
+        if current >= self.num_requests or not previous:
+            return self.remaining
+        # Вес предыдущего окна убывает линейно до конца текущего.
+        return max(
+            self.remaining
+            - self.duration * (self.num_requests - current) / previous,
+            0
+        )
+
+    def wait(self):
+        return self.wait_time
+
+
+class AuthIPRateThrottle(SlidingWindowRateThrottle):
+    scope = 'auth_ip'
+
+
+class AuthIdentityRateThrottle(SlidingWindowRateThrottle):
+    """Ограничивает попытки для одного имени пользователя и одного адреса
+    почты независимо от IP.
+    """
+
+    scope = 'auth_identity'
+    fields = ('username', 'email')
+
+    def get_idents(self, request, view):
+        idents = []
+        data = request.data if hasattr(request.data, 'get') else {}
+        for field in self.fields:
+            value = data.get(field)
+            if isinstance(value, str) and value.strip():
+                # Хеш делает ключ кеша допустимым при любом вводе.
+                idents.append(f'{field}:' + sha256(
+                    value.strip().lower().encode()
+                ).hexdigest())
+        return idents
+
+
+AUTH_THROTTLE_CLASSES = (AuthIPRateThrottle, AuthIdentityRateThrottle)
@@ -3,7 +3,8 @@ from rest_framework import routers
 
 from .views import (
     AuthViewSet, CategoryViewSet, CommentViewSet, GenreViewSet,
-    ReviewViewSet, TitleViewSet, UserViewSet
+    ModerationViewSet, ReviewViewSet, TitleViewSet, UserCommentViewSet,
+    UserReviewViewSet, UserViewSet
 )
 
 router_v1 = routers.DefaultRouter()
@@ -30,6 +31,21 @@ router_v1.register(
     UserViewSet,
     basename='users'
 )
+router_v1.register(
+    r'users/(?P<username>[^/.]+)/reviews',
+    UserReviewViewSet,
+    basename='user-reviews'
+)
+router_v1.register(
+    r'users/(?P<username>[^/.]+)/comments',
+    UserCommentViewSet,
+    basename='user-comments'
+)
+router_v1.register(
+    'moderation',
+    ModerationViewSet,
+    basename='moderation'
+)
 
 
 urlpatterns = [
@@ -1,8 +1,11 @@
-from django.conf import settings
-from django.core.mail import send_mail
+from rest_framework.permissions import SAFE_METHODS
 
+from reviews.outbox import queue_email
 
-def send_confirmation_code(user, confirmation_code):
+FIELDS_QUERY_PARAM = 'fields'
+
+
+def queue_confirmation_code(user, confirmation_code):
     subject = 'Код подтверждения для доступа к YamDB'
     message = (
         f'Добрый день, {user.username}! \n'
@@ -10,10 +13,29 @@ def send_confirmation_code(user, confirmation_code):
         f'для получения токена на YamDB: \n'
         f'{confirmation_code}'
     )
-    user_email = user.email
-    send_mail(
-        subject,
-        message,
-        settings.EMAIL_HOST_USER,
-        [user_email]
-    )
+    queue_email(subject, message, user.email)
+
+
+def get_requested_fields(request):
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    value = request.query_params.get(FIELDS_QUERY_PARAM)
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def only_requested_fields(queryset, fields, *always):
+    columns = {
+        field.name for field in queryset.model._meta.concrete_fields
+    }
+    return queryset.only(*(columns & fields), 'id', *always)
+
+
+def select_requested_fields(queryset, request):
+    # Автор выводится из кеша пользователей по author_id, без JOIN.
+    fields = get_requested_fields(request)
+    if fields is None:
+        return queryset
+    # pub_date нужна курсорной пагинации для позиции страницы.
+    return only_requested_fields(queryset, fields, 'pub_date')
@@ -1,34 +1,67 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import status, viewsets, serializers
 from rest_framework.decorators import action
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from api.filters import TitleFilter
-from api.mixins import ReviewCommentMixin, GenreCategoryMixin
-from api.permissions import AdminPermission, AdminOrReadOnlyPermission
+from api.authentication import user_claims_cache
+from api.cache import get_title_list_cache_stats
+from api.export import NDJSON_CONTENT_TYPE, iter_reviews_ndjson
+from api.filters import TitleFilter, UserSearchFilter
+from api.mixins import (
+    CachedTitleListMixin, ConditionalGetMixin, GenreCategoryMixin,
+    OptionalCursorPaginationMixin, ReviewCommentMixin, UserActivityMixin
+)
+from api.pagination import RatingCursorPagination
+from api.permissions import (
+    AdminPermission, AdminOrReadOnlyPermission, ModeratorPermission
+)
 from api.serializers import (
     CategorySerializer, CommentSerializer, GenreSerializer,
-    GetTokenSerializer, ReviewSerializer, SignUpSerializer,
-    TitleSerializer, UserSerializer
+    GetTokenSerializer, ModerationSerializer, ReviewSerializer,
+    ScoreHistogramSerializer,
+    SignUpSerializer, TitleBulkSerializer, TitleSerializer,
+    UserCommentSerializer, UserReviewSerializer, UserSerializer
+)
+from api.throttling import AUTH_THROTTLE_CLASSES
+from api.utils import (
+    get_requested_fields, only_requested_fields, select_requested_fields,
+    queue_confirmation_code
 )
-from api.utils import send_confirmation_code
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.cache import CATALOG_VERSION_KEY, USERS_VERSION_KEY
+from reviews.models import (
+    Category, Comment, Genre, Review, ScoreHistogram, Title, User
+)
+from reviews.moderation import (
+    delete_comments, delete_reviews, hide_reviews, hide_titles, hide_users
+)
+from reviews.user_cache import user_cache
 
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (AdminPermission,)
-    filter_backends = (SearchFilter,)
-    search_fields = ('username',)
+    filter_backends = (UserSearchFilter,)
     lookup_field = 'username'
     http_method_names = ['get', 'post', 'patch', 'delete']
 
+    def perform_destroy(self, instance):
+        hide_users(User.objects.filter(pk=instance.pk))
+
+    @action(methods=('GET',), detail=False, url_path='cache-stats')
+    def cache_stats(self, request):
+        # Кеши живут в памяти процесса: статистика только этого процесса.
+        return Response({
+            'users': user_cache.stats(),
+            'auth': user_claims_cache.stats(),
+        })
+
     @action(
         methods=('GET', 'PATCH',),
         detail=False,
@@ -36,7 +69,8 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,)
     )
     def me(self, request):
-        instance = self.request.user
+        # В запросе — пользователь из токена, профиль читается из БД.
+        instance = get_object_or_404(User, pk=self.request.user.pk)
         serializer = self.get_serializer(instance)
         if request.method == 'PATCH':
             serializer = self.get_serializer(
@@ -58,18 +92,22 @@ class AuthViewSet(viewsets.ModelViewSet):
 
     @action(methods=['POST'],
             detail=False,
-            permission_classes=[AllowAny])
+            permission_classes=[AllowAny],
+            throttle_classes=AUTH_THROTTLE_CLASSES)
     def signup(self, request):
         try:
             serializer = SignUpSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
-            user, _ = User.objects.get_or_create(
-                **dict(serializer.validated_data)
-            )
-            send_confirmation_code(
-                user=user,
-                confirmation_code=default_token_generator.make_token(user)
-            )
+            # Письмо ставится в очередь той же транзакцией, отправляет его
+            # команда send_emails.
+            with transaction.atomic():
+                user, _ = User.objects.get_or_create(
+                    **dict(serializer.validated_data)
+                )
+                queue_confirmation_code(
+                    user=user,
+                    confirmation_code=default_token_generator.make_token(user)
+                )
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
@@ -82,7 +120,8 @@ class AuthViewSet(viewsets.ModelViewSet):
 
     @action(methods=['POST'],
             detail=False,
-            permission_classes=[AllowAny])
+            permission_classes=[AllowAny],
+            throttle_classes=AUTH_THROTTLE_CLASSES)
     def token(self, request):
         serializer = GetTokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -92,19 +131,75 @@ class AuthViewSet(viewsets.ModelViewSet):
         )
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
+class TitleViewSet(OptionalCursorPaginationMixin, ConditionalGetMixin,
+                   CachedTitleListMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').order_by(
+        F('rating').desc(nulls_last=True), '-id'
+    )
     serializer_class = TitleSerializer
     permission_classes = [AdminOrReadOnlyPermission]
     http_method_names = ['get', 'post', 'patch', 'delete']
     filterset_class = TitleFilter
+    version_keys = (CATALOG_VERSION_KEY,)
+    cursor_pagination_class = RatingCursorPagination
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        queryset = queryset.annotate(
-            rating=Avg('reviews__score')
-        ).order_by('-rating')
-        return queryset
+        fields = get_requested_fields(self.request)
+        if fields is None:
+            return queryset
+        if 'category' not in fields:
+            queryset = queryset.select_related(None)
+        if 'genre' not in fields:
+            queryset = queryset.prefetch_related(None)
+        return only_requested_fields(queryset, fields, 'rating')
+
+    def perform_destroy(self, instance):
+        hide_titles(Title.objects.filter(pk=instance.pk))
+
+    @action(
+        methods=('GET',),
+        detail=False,
+        url_path='cache-stats',
+        permission_classes=(AdminPermission,)
+    )
+    def cache_stats(self, request):
+        return Response(get_title_list_cache_stats())
+
+    @action(methods=('POST', 'PATCH'), detail=False, url_path='bulk')
+    def bulk(self, request):
+        partial = request.method == 'PATCH'
+        serializer = TitleBulkSerializer(
+            Title.objects.all() if partial else None,
+            data=request.data,
+            many=True,
+            partial=partial
+        )
+        serializer.is_valid(raise_exception=True)
+        ids = [title.pk for title in serializer.save()]
+        titles = self.get_queryset().in_bulk(ids)
+        return Response(
+            self.get_serializer(
+                [titles[pk] for pk in ids], many=True
+            ).data,
+            status=(
+                status.HTTP_200_OK if partial else status.HTTP_201_CREATED
+            )
+        )
+
+    @action(methods=('GET',), detail=True, url_path='histogram')
+    def histogram(self, request, pk=None):
+        histogram = ScoreHistogram.objects.filter(
+            title_id=pk, title__is_deleted=False
+        ).first()
+        if histogram is None:
+            # Распределение для произведений, загруженных в обход сигналов.
+            title = get_object_or_404(Title, pk=pk)
+            Title.objects.filter(pk=title.pk).rebuild_score_histograms()
+            histogram = ScoreHistogram.objects.get(title_id=title.pk)
+        return Response(ScoreHistogramSerializer(histogram).data)
 
 
 class CategoryViewSet(GenreCategoryMixin):
@@ -119,27 +214,104 @@ class GenreViewSet(GenreCategoryMixin):
 
 class ReviewViewSet(ReviewCommentMixin):
     serializer_class = ReviewSerializer
-
-    def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+    parent_model = Title
+    parent_lookup_kwargs = {'pk': 'title_id'}
+    parent_field = 'title'
+    parent_version_field = 'reviews_version'
+    version_keys = (USERS_VERSION_KEY,)
+    filter_backends = (OrderingFilter,)
+    ordering_fields = ('pub_date', 'comment_count', 'last_comment_at')
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return select_requested_fields(
+            Review.objects.filter(title_id=self.kwargs.get('title_id')),
+            self.request
+        )
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(
+            author_id=self.request.user.pk, title=self.get_parent()
+        )
+
+    def perform_destroy(self, instance):
+        hide_reviews(Review.objects.filter(pk=instance.pk))
+
+    @action(methods=('GET',), detail=False, url_path='export')
+    def export(self, request, title_id=None):
+        title = self.get_parent()
+        with_comments = request.query_params.get('comments') in (
+            '1', 'true'
+        )
+        response = StreamingHttpResponse(
+            iter_reviews_ndjson(
+                title.reviews.order_by('-pub_date', '-id'), with_comments
+            ),
+            content_type=NDJSON_CONTENT_TYPE
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="title-{title.pk}-reviews.ndjson"'
+        )
+        return response
 
 
 class CommentViewSet(ReviewCommentMixin):
     serializer_class = CommentSerializer
-
-    def get_review(self):
-        title_id = self.kwargs.get('title_id')
-        review_id = self.kwargs.get('review_id')
-        return get_object_or_404(Review, title_id=title_id, pk=review_id)
+    parent_model = Review
+    parent_lookup_kwargs = {'pk': 'review_id', 'title_id': 'title_id'}
+    parent_field = 'review'
+    parent_version_field = 'comments_version'
+    version_keys = (USERS_VERSION_KEY,)
 
     def get_queryset(self):
-        return self.get_review().comments.select_related('author')
+        return select_requested_fields(
+            Comment.objects.filter(
+                review_id=self.kwargs.get('review_id'),
+                review__title_id=self.kwargs.get('title_id')
+            ),
+            self.request
+        )
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(
+            author_id=self.request.user.pk, review=self.get_parent()
+        )
+
+
+class UserReviewViewSet(UserActivityMixin):
+    serializer_class = UserReviewSerializer
+
+    def get_queryset(self):
+        return Review.objects.filter(
+            author_id=self.get_author().pk
+        ).select_related('title')
+
+
+class UserCommentViewSet(UserActivityMixin):
+    serializer_class = UserCommentSerializer
+
+    def get_queryset(self):
+        return Comment.objects.filter(
+            author_id=self.get_author().pk
+        ).select_related('review__title')
+
+
+class ModerationViewSet(viewsets.GenericViewSet):
+    serializer_class = ModerationSerializer
+    permission_classes = (ModeratorPermission,)
+
+    def moderate(self, queryset, delete):
+        serializer = self.get_serializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        deleted = delete(serializer.filter_queryset(queryset))
+        return Response({
+            'reviews': deleted.get(Review._meta.label, 0),
+            'comments': deleted.get(Comment._meta.label, 0)
+        })
+
+    @action(methods=('POST',), detail=False)
+    def reviews(self, request):
+        return self.moderate(Review.objects.all(), delete_reviews)
+
+    @action(methods=('POST',), detail=False)
+    def comments(self, request):
+        return self.moderate(Comment.objects.all(), delete_comments)
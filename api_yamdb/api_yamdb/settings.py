@@ -74,6 +74,24 @@ DATABASES = {
 }
 
 
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Версии каталога и пользователей, по которым сбрасываются кеши
+    # ответов, ETag и права из токенов, должны быть общими для всех
+    # процессов. Ключей всего два, поэтому файлового кеша достаточно
+    # процессам одного сервера; для нескольких серверов — Memcached.
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'versions',
+        'TIMEOUT': None,
+    },
+}
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -113,7 +131,7 @@ STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.RoleJWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -121,6 +139,14 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': PAGE_SIZE,
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': '20/min',
+        'auth_identity': '5/min',
+    },
+    # Число доверенных прокси перед приложением. При 0 IP берётся из
+    # REMOTE_ADDR, а подделанный X-Forwarded-For не меняет счётчик. За
+    # обратным прокси укажите число прокси.
+    'NUM_PROXIES': 0,
 }
 
 SIMPLE_JWT = {
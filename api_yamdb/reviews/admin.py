@@ -2,14 +2,30 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group
 
-from .models import Category, Comment, Genre, Review, Title, User
+from .models import (
+    Category, Comment, Genre, OutgoingEmail, Review, Title, User
+)
+from .moderation import hide_comments, hide_reviews, hide_titles, hide_users
 
 
 admin.site.unregister(Group)
 
 
+class SoftDeleteAdminMixin:
+    # Удаление из админки, как и через API, только скрывает строки:
+    # зависимые порциями удаляет purge_deleted.
+    hide = None
+
+    def delete_model(self, request, obj):
+        self.hide(self.model.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        self.hide(queryset)
+
+
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(SoftDeleteAdminMixin, BaseUserAdmin):
+    hide = staticmethod(hide_users)
     fieldsets = (
         (None, {'fields': ('username', 'password')}),
         ('Персональная информация', {'fields': (
@@ -44,9 +60,11 @@ class UserAdmin(BaseUserAdmin):
 
 
 @admin.register(Title)
-class TitleAdmin(admin.ModelAdmin):
+class TitleAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
+    hide = staticmethod(hide_titles)
     list_display = (
         'id', 'name', 'year', 'description', 'get_genres', 'category',
+        'rating',
     )
     list_display_links = ('name', 'get_genres',)
     list_editable = ('category',)
@@ -69,10 +87,23 @@ class GenreAdmin(admin.ModelAdmin):
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
-    list_display = ('id', 'text', 'title', 'author', 'pub_date', 'score',)
+class ReviewAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
+    hide = staticmethod(hide_reviews)
+    list_display = (
+        'id', 'text', 'title', 'author', 'pub_date', 'score', 'comment_count',
+    )
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
+    hide = staticmethod(hide_comments)
     list_display = ('id', 'text', 'author', 'pub_date', 'review',)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'to', 'subject', 'created_at', 'attempts', 'next_attempt_at',
+        'sent_at',
+    )
+    list_filter = ('sent_at',)
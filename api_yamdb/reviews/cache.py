@@ -0,0 +1,50 @@
+from time import time_ns
+
+from django.core.cache import caches
+from django.db import transaction
+
+# Версии хранятся как время последнего изменения в наносекундах: новое
+# значение всегда отличается от закешированных ранее и одновременно служит
+# значением Last-Modified. Версии отдельных произведений и отзывов хранятся
+# в их строках БД, а в общем для всех процессов кеше — только версии
+# каталога и пользователей, так что число ключей в нём не растёт.
+# Потерянная версия создаётся заново и лишь сбрасывает зависящие от неё
+# кеши.
+VERSIONS_CACHE_ALIAS = 'versions'
+CATALOG_VERSION_KEY = 'catalog:version'
+USERS_VERSION_KEY = 'users:version'
+
+
+def new_version():
+    return time_ns()
+
+
+def get_version(key):
+    cache = caches[VERSIONS_CACHE_ALIAS]
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(*keys):
+    caches[VERSIONS_CACHE_ALIAS].set_many(
+        dict.fromkeys(keys, new_version()), timeout=None
+    )
+
+
+def bump_version_on_commit(*keys):
+    transaction.on_commit(lambda: bump_version(*keys))
+
+
+def get_catalog_version():
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    bump_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version_on_commit():
+    bump_version_on_commit(CATALOG_VERSION_KEY)
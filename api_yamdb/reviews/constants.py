@@ -7,3 +7,18 @@ MIN_RATING_VALUE: int = 0
 MAX_RATING_VALUE: int = 10
 NAME_MAX_LENGTH_LIMIT: int = 150
 EMAIL_MAX_LENGTH_LIMIT: int = 254
+RATING_PRIOR_WEIGHT: int = 10
+RATING_PRIOR_MEAN: float = (MIN_RATING_VALUE + MAX_RATING_VALUE) / 2
+LEADERBOARD_MAX_SIZE: int = 100
+TITLE_LIST_CACHE_TIMEOUT: int = 5 * 60
+MODERATION_MAX_IDS: int = 1000
+EXPORT_CHUNK_SIZE: int = 500
+PURGE_BATCH_SIZE: int = 500
+OUTBOX_BATCH_SIZE: int = 100
+OUTBOX_MAX_ATTEMPTS: int = 5
+OUTBOX_RETRY_DELAY: int = 60
+AUTH_USER_CACHE_SIZE: int = 10000
+AUTH_USER_CACHE_TIMEOUT: int = 60
+USER_CACHE_SIZE: int = 10000
+USER_CACHE_TIMEOUT: int = 5 * 60
+IMPORT_BATCH_SIZE: int = 1000
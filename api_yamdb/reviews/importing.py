@@ -0,0 +1,84 @@
+from graphlib import TopologicalSorter
+
+import django
+from django.apps import apps
+from django.db import connections, transaction
+
+# Столбцы CSV, названные не так, как атрибуты моделей.
+CSV_COLUMN_ATTNAMES = {'author': 'author_id', 'category': 'category_id'}
+
+
+def get_object(model, data):
+    return model(**{
+        CSV_COLUMN_ATTNAMES.get(key, key): value
+        for key, value in data.items()
+    })
+
+
+def get_load_order(models):
+    """Уровни графа зависимостей моделей по внешним ключам: таблицы одного
+    уровня не ссылаются друг на друга и загружаются одновременно.
+    """
+    sorter = TopologicalSorter({
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.is_relation
+            and field.related_model in models
+            and field.related_model is not model
+        } for model in models
+    })
+    sorter.prepare()
+    while sorter.is_active():
+        level = sorter.get_ready()
+        yield level
+        sorter.done(*level)
+
+
+def get_insert_sql(model, connection):
+    quote_name = connection.ops.quote_name
+    fields = model._meta.local_concrete_fields
+    return (
+        f'INSERT INTO {quote_name(model._meta.db_table)} '
+        f'({", ".join(quote_name(field.column) for field in fields)}) '
+        f'VALUES ({", ".join(["%s"] * len(fields))})'
+    )
+
+
+def prepare_rows(model, header, rows, connection):
+    # То же, что bulk_create делает с каждым объектом перед вставкой,
+    # включая pre_save полей: значения по умолчанию, производные поля.
+    fields = model._meta.local_concrete_fields
+    return [
+        tuple(
+            field.get_db_prep_save(field.pre_save(obj, True), connection)
+            for field in fields
+        ) for obj in (
+            get_object(model, dict(zip(header, row))) for row in rows
+        )
+    ]
+
+
+def write_rows(model, params, connection):
+    # Без транзакции executemany фиксирует каждую строку отдельно.
+    with transaction.atomic(using=connection.alias, savepoint=False):
+        with connection.cursor() as cursor:
+            cursor.executemany(get_insert_sql(model, connection), params)
+
+
+def init_worker():
+    # При запуске процессов через spawn Django настраивается заново.
+    django.setup()
+
+
+def parse_chunk(label, header, rows, using, write):
+    """Выполняется в процессе пула: разбирает порцию строк CSV и либо
+    сам записывает её своим соединением, либо возвращает параметры
+    вставки процессу, который пишет в БД.
+    """
+    model = apps.get_model(label)
+    connection = connections[using]
+    params = prepare_rows(model, header, rows, connection)
+    if not write:
+        return len(params), params
+    write_rows(model, params, connection)
+    return len(params), None
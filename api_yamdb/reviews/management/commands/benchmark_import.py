@@ -0,0 +1,118 @@
+import csv
+from io import StringIO
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.constants import IMPORT_BATCH_SIZE
+
+PUB_DATE = '2020-01-01T00:00:00Z'
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def generate_dataset(data_dir, rows):
+    """Синтетические файлы для import_data: около rows строк, из них
+    примерно 60% отзывов и 35% комментариев.
+    """
+    users = titles = max(rows // 100, 100)
+    reviews = rows * 6 // 10
+    per_title = max(reviews // titles, 1)
+    step = max(users // per_title, 1)
+    reviews = per_title * titles
+    comments = max(rows - 2 * 100 - users - 3 * titles - reviews, 0)
+    write_csv(
+        f'{data_dir}/category.csv', ('id', 'name', 'slug'),
+        ((idx, f'Категория {idx}', f'category-{idx}')
+         for idx in range(1, 101))
+    )
+    write_csv(
+        f'{data_dir}/genre.csv', ('id', 'name', 'slug'),
+        ((idx, f'Жанр {idx}', f'genre-{idx}') for idx in range(1, 101))
+    )
+    write_csv(
+        f'{data_dir}/users.csv',
+        ('id', 'username', 'email', 'role', 'bio', 'first_name',
+         'last_name'),
+        ((idx, f'user{idx}', f'user{idx}@bench.fake', 'user', '', '', '')
+         for idx in range(1, users + 1))
+    )
+    write_csv(
+        f'{data_dir}/titles.csv', ('id', 'name', 'year', 'category'),
+        ((idx, f'Произведение {idx}', 2000, idx % 100 + 1)
+         for idx in range(1, titles + 1))
+    )
+    write_csv(
+        f'{data_dir}/genre_title.csv', ('id', 'title_id', 'genre_id'),
+        ((2 * idx + shift + 1, idx + 1, (idx + shift) % 100 + 1)
+         for idx in range(titles) for shift in range(2))
+    )
+    # У каждого произведения per_title отзывов разных авторов.
+    write_csv(
+        f'{data_dir}/review.csv',
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        ((title * per_title + idx + 1, title + 1, 'Синтетический отзыв',
+          (title * 7 + idx * step) % users + 1, idx % 10 + 1, PUB_DATE)
+         for title in range(titles) for idx in range(per_title))
+    )
+    write_csv(
+        f'{data_dir}/comments.csv',
+        ('id', 'review_id', 'text', 'author', 'pub_date'),
+        ((idx + 1, idx % reviews + 1, 'Синтетический комментарий',
+          idx % users + 1, PUB_DATE) for idx in range(comments))
+    )
+    return 2 * 100 + users + 3 * titles + reviews + comments
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер import_data на синтетических данных: последовательная '
+        'загрузка против параллельной. Данные загружаются в транзакции, '
+        'которая затем откатывается; запускайте на копии базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=10_000_000,
+            help='Сколько строк во всех файлах вместе'
+        )
+        parser.add_argument(
+            '--workers', type=int, nargs='+', default=(1, 4),
+            help='Число процессов для каждого замера; 1 — без пула'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE
+        )
+
+    def handle(self, *args, rows, workers, batch_size, **options):
+        with TemporaryDirectory() as data_dir:
+            started = perf_counter()
+            rows = generate_dataset(data_dir, rows)
+            self.stdout.write(
+                f'Сгенерировано строк: {rows} '
+                f'за {perf_counter() - started:.1f} с'
+            )
+            baseline = None
+            for count in workers:
+                with transaction.atomic():
+                    started = perf_counter()
+                    call_command(
+                        'import_data', data_dir=data_dir, workers=count,
+                        batch_size=batch_size, stdout=StringIO()
+                    )
+                    elapsed = perf_counter() - started
+                    transaction.set_rollback(True)
+                baseline = baseline or elapsed
+                self.stdout.write(
+                    f'Процессов {count}: {elapsed:.1f} с, '
+                    f'{rows / elapsed:.0f} строк/с, '
+                    f'ускорение x{baseline / elapsed:.2f}'
+                )
@@ -0,0 +1,89 @@
+from itertools import islice
+from random import Random
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.constants import PAGE_SIZE
+from reviews.models import User
+from reviews.search import search_users
+
+SYLLABLES = (
+    'ka', 'ro', 'mi', 'ta', 'ne', 'so', 'li', 'va', 'de', 'zu', 'po', 'gr',
+    'an', 'el', 'or', 'ix', 'bo', 'ch', 'sh', 'yu'
+)
+QUERIES = ('k', 'ka', 'karo', 'karomi', 'miso')
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер поиска пользователей по имени на синтетических данных. '
+        'Пользователи создаются в транзакции, которая в конце '
+        'откатывается; запускайте на копии базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=1_000_000,
+            help='Сколько синтетических пользователей создать'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз повторять каждый запрос'
+        )
+
+    def generate_users(self, count):
+        random = Random(count)
+        for idx in range(count):
+            name = ''.join(
+                random.choice(SYLLABLES) for _ in range(random.randint(2, 4))
+            )
+            username = f'{name.capitalize()}{idx}'
+            yield User(
+                username=username, email=f'{username.lower()}@bench.fake'
+            )
+
+    def measure(self, search, query, repeat):
+        # Как при пагинации по умолчанию: подсчёт и первая страница.
+        timings = []
+        for _ in range(repeat):
+            started = perf_counter()
+            queryset = search(User.objects.all(), query)
+            queryset.count()
+            list(queryset[:PAGE_SIZE])
+            timings.append(perf_counter() - started)
+        return median(timings) * 1000
+
+    def handle(self, *args, users, repeat, **options):
+        searches = {
+            'icontains': lambda queryset, query: queryset.filter(
+                username__icontains=query
+            ),
+            'prefix': lambda queryset, query: search_users(
+                queryset, query, prefix=True
+            ),
+            'contains': search_users,
+        }
+        with transaction.atomic():
+            started = perf_counter()
+            generated = self.generate_users(users)
+            # bulk_create собирает все объекты в список, поэтому порции.
+            for _ in range(0, users, BATCH_SIZE):
+                User.objects.bulk_create(list(islice(generated, BATCH_SIZE)))
+            self.stdout.write(
+                f'Создано пользователей: {users} '
+                f'за {perf_counter() - started:.1f} с'
+            )
+            self.stdout.write(
+                'запрос'.ljust(10)
+                + ''.join(label.rjust(12) for label in searches)
+            )
+            for query in QUERIES:
+                self.stdout.write(query.ljust(10) + ''.join(
+                    f'{self.measure(search, query, repeat):9.2f} мс'
+                    for search in searches.values()
+                ))
+            transaction.set_rollback(True)
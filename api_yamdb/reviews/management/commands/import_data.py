@@ -1,10 +1,27 @@
 import csv
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from time import monotonic
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import (
+    DEFAULT_DB_ALIAS, connections, reset_queries, transaction
+)
 
+from reviews.cache import bump_catalog_version
+from reviews.constants import IMPORT_BATCH_SIZE
+from reviews.importing import (
+    get_load_order, get_object, init_worker, parse_chunk, write_rows
+)
 from reviews.models import Category, Comment, Genre, Review, Title, User
 
+# Не чаще раза в столько секунд команда сообщает о ходе загрузки таблицы.
+PROGRESS_INTERVAL = 5
+# Сколько порций на процесс пула может ждать записи.
+PENDING_BATCHES_PER_WORKER = 2
+
 
 class Command(BaseCommand):
     help = 'Загрузка данных в БД из .csv файлов'
@@ -21,22 +38,150 @@ class Command(BaseCommand):
 
     CSV_FILES_DIR = f'{settings.BASE_DIR}/static/data'
 
-    def handle(self, *args, **options):
-        for model, filename in self.csv_tables.items():
-            with open(
-                f'{self.CSV_FILES_DIR}/{filename}',
-                'r',
-                encoding='utf-8'
-            ) as csv_file:
-                reader = csv.DictReader(csv_file)
-                model.objects.bulk_create(
-                    (
-                        model(**{'author_id' if key == 'author'
-                                 else 'category_id' if key == 'category'
-                                 else key: val for key, val in data.items()
-                                 }) for data in reader)
-                )
-                self.stdout.write(
-                    f'Обьекты <{model}> '
-                    'успешно загружены в базу данных!'
-                )
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+            help='Сколько строк читать в память и записывать одним запросом'
+        )
+        parser.add_argument(
+            '--data-dir', default=self.CSV_FILES_DIR,
+            help='Каталог с .csv файлами'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help=(
+                'Сколько процессов разбирают файлы; независимые таблицы '
+                'загружаются одновременно'
+            )
+        )
+
+    @staticmethod
+    def get_progress(rows, elapsed):
+        rate = rows / elapsed if elapsed else rows
+        return f'{rows} строк за {elapsed:.1f} с ({rate:.0f} строк/с)'
+
+    def report_progress(self, model, rows, elapsed):
+        self.stdout.write(
+            f'<{model.__name__}>: загружено '
+            f'{self.get_progress(rows, elapsed)}'
+        )
+
+    def report_loaded(self, model, rows, elapsed):
+        self.stdout.write(
+            f'Обьекты <{model.__name__}> успешно загружены в базу данных: '
+            f'{self.get_progress(rows, elapsed)}'
+        )
+
+    def load_table(self, model, path, batch_size):
+        # Файл читается потоком: в памяти не больше одной порции строк,
+        # сколько бы их ни было в файле. Таблица загружается одной
+        # транзакцией: при ошибке в ней не остаётся части строк.
+        rows = 0
+        started = reported = monotonic()
+        with open(path, encoding='utf-8') as csv_file, transaction.atomic():
+            objects = (
+                get_object(model, data)
+                for data in csv.DictReader(csv_file)
+            )
+            batch = list(islice(objects, batch_size))
+            while batch:
+                model.objects.bulk_create(batch)
+                # При DEBUG Django хранит текст каждого запроса.
+                reset_queries()
+                rows += len(batch)
+                if monotonic() - reported >= PROGRESS_INTERVAL:
+                    reported = monotonic()
+                    self.report_progress(model, rows, reported - started)
+                batch = list(islice(objects, batch_size))
+        self.report_loaded(model, rows, monotonic() - started)
+
+    def iter_batches(self, level, data_dir, batch_size):
+        for model in level:
+            path = f'{data_dir}/{self.csv_tables[model]}'
+            with open(path, 'r', encoding='utf-8') as csv_file:
+                reader = csv.reader(csv_file)
+                header = next(reader, None)
+                batch = list(islice(reader, batch_size))
+                while header and batch:
+                    yield model, header, batch
+                    batch = list(islice(reader, batch_size))
+
+    def load_level(self, pool, level, options):
+        connection = connections[options['using']]
+        rows = dict.fromkeys(level, 0)
+        finished = dict.fromkeys(level, 0)
+        started = reported = monotonic()
+        pending = deque()
+
+        def finish():
+            nonlocal reported
+            model, future = pending.popleft()
+            count, params = future.result()
+            if params is not None:
+                write_rows(model, params, connection)
+                reset_queries()
+            rows[model] += count
+            finished[model] = monotonic() - started
+            if monotonic() - reported >= PROGRESS_INTERVAL:
+                reported = monotonic()
+                self.report_progress(model, rows[model], finished[model])
+
+        for model, header, batch in self.iter_batches(
+            level, options['data_dir'], options['batch_size']
+        ):
+            pending.append((model, pool.submit(
+                parse_chunk, model._meta.label, header, batch,
+                options['using'], options['write']
+            )))
+            if len(pending) > options['max_pending']:
+                finish()
+        while pending:
+            finish()
+        for model in level:
+            self.report_loaded(model, rows[model], finished[model])
+
+    def load_parallel(self, data_dir, batch_size, workers,
+                      using=DEFAULT_DB_ALIAS):
+        connection = connections[using]
+        # SQLite допускает одного писателя, а в открытую транзакцию
+        # вызывающего кода процессы пула войти не могут: тогда процессы
+        # только разбирают файлы, а пишет этот процесс.
+        write = not (
+            connection.vendor == 'sqlite' or connection.in_atomic_block
+        )
+        if write:
+            # Открытое соединение не должно достаться процессам пула.
+            connections.close_all()
+        options = {
+            'data_dir': data_dir,
+            'batch_size': batch_size,
+            'using': using,
+            'write': write,
+            'max_pending': workers * PENDING_BATCHES_PER_WORKER,
+        }
+        with ProcessPoolExecutor(workers, initializer=init_worker) as pool:
+            for level in get_load_order(self.csv_tables):
+                if write:
+                    # Порции фиксируют процессы пула, каждую отдельно.
+                    self.load_level(pool, level, options)
+                    continue
+                with transaction.atomic(using=using):
+                    self.load_level(pool, level, options)
+
+    def handle(self, *args, batch_size, data_dir, workers, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        if workers < 1:
+            raise CommandError('--workers должен быть больше нуля.')
+        if workers > 1:
+            self.load_parallel(data_dir, batch_size, workers)
+        else:
+            for model, filename in self.csv_tables.items():
+                self.load_table(model, f'{data_dir}/{filename}', batch_size)
+        # Строки вставляются без сигналов, рейтинги пересчитываются целиком.
+        Title.objects.rebuild_ratings()
+        Title.objects.refresh_rankings()
+        Title.objects.rebuild_score_histograms()
+        Review.objects.rebuild_comment_stats()
+        bump_catalog_version()
+        self.stdout.write('Рейтинги произведений пересчитаны!')
@@ -0,0 +1,39 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.constants import PURGE_BATCH_SIZE
+from reviews.moderation import purge_deleted
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаление скрытых пользователей, произведений, отзывов и '
+        'комментариев вместе с зависимыми записями порциями по отдельным '
+        'транзакциям'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=PURGE_BATCH_SIZE,
+            help='Сколько строк удалять одной транзакцией'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help=(
+                'Работать постоянно, проверяя новые скрытые записи '
+                'с этим интервалом в секундах'
+            )
+        )
+
+    def handle(self, *args, batch_size, interval, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        while True:
+            action, counts = purge_deleted(batch_size)
+            for label, count in counts.items():
+                self.stdout.write(f'{action} {label}: {count}')
+            if not counts:
+                if not interval:
+                    return
+                sleep(interval)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.cache import bump_catalog_version
+from reviews.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчёт сохранённых рейтингов произведений по отзывам, '
+        'рейтингов категорий и жанров, распределений оценок '
+        'и счётчиков комментариев к отзывам'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Title.objects.rebuild_ratings()
+            Title.objects.refresh_rankings()
+            Title.objects.rebuild_score_histograms()
+            Review.objects.rebuild_comment_stats()
+        bump_catalog_version()
+        self.stdout.write(f'Рейтинги пересчитаны для {updated} произведений')
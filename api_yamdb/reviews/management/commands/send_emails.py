@@ -0,0 +1,39 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.constants import OUTBOX_BATCH_SIZE
+from reviews.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправка писем из очереди исходящих порциями через одно '
+        'соединение с почтовым сервером, с повторными попытками'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=OUTBOX_BATCH_SIZE,
+            help='Сколько писем выбирать из очереди за раз'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help=(
+                'Работать постоянно, проверяя очередь с этим интервалом '
+                'в секундах'
+            )
+        )
+
+    def handle(self, *args, batch_size, interval, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        while True:
+            sent, failed = drain_outbox(batch_size)
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, отложено: {failed}'
+                )
+            if not interval:
+                return
+            sleep(interval)
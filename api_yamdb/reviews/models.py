@@ -1,16 +1,74 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.core.mail import EmailMessage
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from django.db.models import UniqueConstraint
+from django.db import models, transaction
+from django.db.models import (
+    Avg, Case, Count, ExpressionWrapper, F, Index, Max, OuterRef, Q,
+    Subquery, Sum, UniqueConstraint, Value, When
+)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
 
+from reviews.cache import new_version
 from reviews.constants import (
     TEXT_LENGTH_LIMIT, MIN_RATING_VALUE, MAX_RATING_VALUE,
     NAME_MAX_LENGTH_LIMIT, EMAIL_MAX_LENGTH_LIMIT, MIN_YEAR_VALUE,
-    MODEL_NAME_LENGTH_LIMIT
+    MODEL_NAME_LENGTH_LIMIT, RATING_PRIOR_MEAN, RATING_PRIOR_WEIGHT
 )
 from reviews.validators import validate_username, validate_current_year
 
 
+class VisibleManagerMixin:
+    # Скрытые (мягко удалённые) строки ждут фоновой очистки purge_deleted
+    # и не видны через менеджер по умолчанию, как и строки скрытых
+    # родителей hidden_parents; all_objects видит все. Рейтинги и счётчики
+    # учитывают строки без флага is_deleted: строки скрытых родителей
+    # исключает из них purge_deleted.
+    hidden_parents = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset().filter(is_deleted=False)
+        for parent in self.hidden_parents:
+            model = self.model
+            for name in parent.split('__'):
+                model = model._meta.get_field(name).related_model
+            # Скрытых строк немного, пока их не удалит очистка: подзапрос
+            # по индексу is_deleted вычисляется один раз и не требует
+            # соединения с родителем для каждой строки.
+            queryset = queryset.exclude(**{
+                f'{parent}__in': model._base_manager.filter(
+                    is_deleted=True
+                ).values('pk')
+            })
+        return queryset
+
+
+class VisibleUserManager(VisibleManagerMixin, UserManager):
+    pass
+
+
+class LowercaseCopyField(models.CharField):
+    """Хранит копию поля source в нижнем регистре для индексируемого
+    поиска без учёта регистра. Заполняется и при save, и при bulk_create.
+    """
+
+    def __init__(self, *args, source, **kwargs):
+        self.source = source
+        kwargs['editable'] = False
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        del kwargs['editable']
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = (getattr(model_instance, self.source) or '').lower()
+        setattr(model_instance, self.attname, value)
+        return value
+
+
 class User(AbstractUser):
     ADMIN = 'admin'
     MODERATOR = 'moderator'
@@ -28,6 +86,13 @@ class User(AbstractUser):
         max_length=NAME_MAX_LENGTH_LIMIT,
         unique=True
     )
+    # Поиск по началу имени идёт диапазоном по индексу этого поля.
+    username_lower = LowercaseCopyField(
+        'имя пользователя в нижнем регистре',
+        source='username',
+        max_length=NAME_MAX_LENGTH_LIMIT,
+        db_index=True
+    )
     email = models.EmailField(
         'адрес электронной почты',
         max_length=EMAIL_MAX_LENGTH_LIMIT,
@@ -44,6 +109,20 @@ class User(AbstractUser):
         choices=ROLE_CHOICES,
         default=USER
     )
+    is_deleted = models.BooleanField(
+        'скрыт до удаления',
+        default=False,
+        editable=False,
+        db_index=True
+    )
+
+    objects = VisibleUserManager()
+    all_objects = UserManager()
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is not None and 'username' in update_fields:
+            update_fields = {*update_fields, 'username_lower'}
+        super().save(*args, update_fields=update_fields, **kwargs)
 
     @property
     def is_moderator(self):
@@ -91,6 +170,119 @@ class Genre(BaseNamedSlugModel):
         verbose_name_plural = 'Жанры произведений'
 
 
+def get_weighted_rating(rating_sum, rating_count):
+    # Априорное среднее — середина шкалы, а не средняя оценка каталога:
+    # рейтинги пересчитываются по одному произведению, и с плавающим
+    # средним сохранённые в разное время значения были бы несравнимы,
+    # а пересчёт всего каталога на каждый отзыв слишком дорог.
+    return (
+        (RATING_PRIOR_WEIGHT * RATING_PRIOR_MEAN + rating_sum)
+        / (RATING_PRIOR_WEIGHT + rating_count)
+    )
+
+
+class TitleQuerySet(models.QuerySet):
+
+    def update_rating(self, score_delta, count_delta):
+        rating_sum = F('rating_sum') + score_delta
+        rating_count = F('rating_count') + count_delta
+        return self.update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            reviews_version=new_version(),
+            rating=Case(
+                When(rating_count=-count_delta, then=None),
+                default=ExpressionWrapper(
+                    Cast(rating_sum, models.FloatField()) / rating_count,
+                    output_field=models.FloatField()
+                ),
+                output_field=models.FloatField()
+            )
+        )
+
+    def rebuild_ratings(self):
+        reviews = Review.all_objects.filter(
+            title=OuterRef('pk'), is_deleted=False
+        ).order_by().values('title')
+        return self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(value=Sum('score')).values('value')),
+                0
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(value=Count('pk')).values('value')),
+                0
+            ),
+            rating=Subquery(
+                reviews.annotate(value=Avg('score')).values('value')
+            ),
+            reviews_version=new_version()
+        )
+
+    def bump_reviews_version(self):
+        return self.update(reviews_version=new_version())
+
+    def rebuild_score_histograms(self):
+        # Пересчёт может выполняться одновременно для одного произведения,
+        # например при первых чтениях его распределения: строку,
+        # вставленную другой транзакцией, вставка пропускает.
+        titles = self.order_by().values('pk')
+        with transaction.atomic():
+            ScoreHistogram.objects.filter(title_id__in=titles).delete()
+            counts = {pk: {} for pk in self.values_list('pk', flat=True)}
+            for title_id, score, count in Review.all_objects.filter(
+                title_id__in=titles, is_deleted=False
+            ).order_by().values('title_id', 'score').annotate(
+                count=Count('pk')
+            ).values_list('title_id', 'score', 'count'):
+                counts[title_id][ScoreHistogram.get_field_name(score)] = count
+            return ScoreHistogram.objects.bulk_create(
+                (
+                    ScoreHistogram(title_id=pk, **fields)
+                    for pk, fields in counts.items()
+                ),
+                ignore_conflicts=True
+            )
+
+    def refresh_rankings(self):
+        titles = self.order_by().values('pk')
+        CategoryRanking.objects.filter(title_id__in=titles).delete()
+        GenreRanking.objects.filter(title_id__in=titles).delete()
+        rated_titles = self.order_by().filter(rating_count__gt=0)
+        weighted_ratings = {}
+        category_rankings = []
+        for pk, category_id, rating_sum, rating_count in (
+            rated_titles.values_list(
+                'pk', 'category_id', 'rating_sum', 'rating_count'
+            )
+        ):
+            weighted_ratings[pk] = get_weighted_rating(
+                rating_sum, rating_count
+            )
+            if category_id is not None:
+                category_rankings.append(CategoryRanking(
+                    title_id=pk,
+                    category_id=category_id,
+                    weighted_rating=weighted_ratings[pk]
+                ))
+        CategoryRanking.objects.bulk_create(category_rankings)
+        GenreRanking.objects.bulk_create(
+            GenreRanking(
+                title_id=title_id,
+                genre_id=genre_id,
+                weighted_rating=weighted_ratings[title_id]
+            ) for title_id, genre_id in Title.genre.through.objects.filter(
+                title_id__in=rated_titles.values('pk')
+            ).values_list('title_id', 'genre_id')
+        )
+
+
+class VisibleTitleManager(
+    VisibleManagerMixin, models.Manager.from_queryset(TitleQuerySet)
+):
+    pass
+
+
 class Title(models.Model):
     name = models.CharField(
         max_length=MODEL_NAME_LENGTH_LIMIT,
@@ -118,15 +310,163 @@ class Title(models.Model):
         null=True,
         db_column='category'
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False
+    )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        null=True,
+        editable=False
+    )
+    is_deleted = models.BooleanField(
+        verbose_name='Скрыто до удаления',
+        default=False,
+        editable=False,
+        db_index=True
+    )
+    # Версия списка отзывов для ETag: меняется тем же UPDATE, что
+    # обновляет рейтинг.
+    reviews_version = models.BigIntegerField(
+        verbose_name='Версия отзывов',
+        default=new_version,
+        editable=False
+    )
+
+    objects = VisibleTitleManager()
+    all_objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=('rating', 'id'), name='title_rating_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class ScoreHistogram(models.Model):
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='Произведение',
+        related_name='score_histogram'
+    )
+
+    class Meta:
+        verbose_name = 'распределение оценок'
+        verbose_name_plural = 'Распределения оценок'
+
+    def __str__(self):
+        return str(self.title)
+
+    @staticmethod
+    def get_field_name(score):
+        return f'score_{score}'
+
+    def get_counts(self):
+        return {
+            score: getattr(self, self.get_field_name(score))
+            for score in range(MIN_RATING_VALUE, MAX_RATING_VALUE + 1)
+        }
+
+    @classmethod
+    def add_score(cls, title_id, score, delta):
+        field_name = cls.get_field_name(score)
+        return cls.objects.filter(title_id=title_id).update(
+            **{field_name: F(field_name) + delta}
+        )
+
+
+for score in range(MIN_RATING_VALUE, MAX_RATING_VALUE + 1):
+    ScoreHistogram.add_to_class(
+        ScoreHistogram.get_field_name(score),
+        models.PositiveIntegerField(
+            verbose_name=f'Количество оценок {score}',
+            default=0
+        )
+    )
+
+
+class BaseRanking(models.Model):
+    # Строки ранжирования удаляются сигналом после удаления произведения,
+    # поэтому ограничение внешнего ключа в БД не создаётся.
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name='Произведение',
+        related_name='+'
+    )
+    weighted_rating = models.FloatField(verbose_name='Взвешенный рейтинг')
+
+    class Meta:
+        abstract = True
+        ordering = ('-weighted_rating', '-title_id')
+
+    def __str__(self):
+        return f'{self.title}: {self.weighted_rating}'
+
+
+class CategoryRanking(BaseRanking):
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        verbose_name='Категория',
+        related_name='rankings'
+    )
+
+    class Meta(BaseRanking.Meta):
+        verbose_name = 'место в рейтинге категории'
+        verbose_name_plural = 'Рейтинги категорий'
+        constraints = [
+            UniqueConstraint(
+                fields=['category', 'title'],
+                name='unique_category_ranking'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('category', '-weighted_rating', '-title'),
+                name='category_ranking_idx'
+            ),
+        ]
+
+
+class GenreRanking(BaseRanking):
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        verbose_name='Жанр',
+        related_name='rankings'
+    )
+
+    class Meta(BaseRanking.Meta):
+        verbose_name = 'место в рейтинге жанра'
+        verbose_name_plural = 'Рейтинги жанров'
+        constraints = [
+            UniqueConstraint(
+                fields=['genre', 'title'],
+                name='unique_genre_ranking'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('genre', '-weighted_rating', '-title'),
+                name='genre_ranking_idx'
+            ),
+        ]
+
+
 class AbstractUserContent(models.Model):
     author = models.ForeignKey(
         User,
@@ -151,6 +491,59 @@ class AbstractUserContent(models.Model):
         return f'{self.author}: {self.text}'[:TEXT_LENGTH_LIMIT]
 
 
+class ReviewQuerySet(models.QuerySet):
+
+    def add_comment(self, pub_date):
+        return self.update(
+            comment_count=F('comment_count') + 1,
+            comments_version=new_version(),
+            last_comment_at=Case(
+                When(last_comment_at__gte=pub_date, then=F('last_comment_at')),
+                default=Value(pub_date),
+                output_field=models.DateTimeField()
+            )
+        )
+
+    def remove_comment(self, count=1):
+        return self.update(
+            comment_count=F('comment_count') - count,
+            comments_version=new_version(),
+            last_comment_at=self.get_last_comment_at()
+        )
+
+    def rebuild_comment_stats(self):
+        comments = Comment.all_objects.filter(
+            review=OuterRef('pk'), is_deleted=False
+        ).order_by().values('review')
+        return self.update(
+            comment_count=Coalesce(
+                Subquery(comments.annotate(value=Count('pk')).values('value')),
+                0
+            ),
+            last_comment_at=self.get_last_comment_at(),
+            comments_version=new_version()
+        )
+
+    def bump_comments_version(self):
+        return self.update(comments_version=new_version())
+
+    @staticmethod
+    def get_last_comment_at():
+        return Subquery(
+            Comment.all_objects.filter(
+                review=OuterRef('pk'), is_deleted=False
+            ).order_by().values('review').annotate(
+                value=Max('pub_date')
+            ).values('value')
+        )
+
+
+class VisibleReviewManager(
+    VisibleManagerMixin, models.Manager.from_queryset(ReviewQuerySet)
+):
+    hidden_parents = ('title', 'author')
+
+
 class Review(AbstractUserContent):
     title = models.ForeignKey(
         Title,
@@ -171,6 +564,32 @@ class Review(AbstractUserContent):
             )
         ],
     )
+    comment_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False
+    )
+    last_comment_at = models.DateTimeField(
+        verbose_name='Дата последнего комментария',
+        null=True,
+        editable=False
+    )
+    is_deleted = models.BooleanField(
+        verbose_name='Скрыт до удаления',
+        default=False,
+        editable=False,
+        db_index=True
+    )
+    # Версия списка комментариев для ETag: меняется тем же UPDATE, что
+    # обновляет счётчик комментариев.
+    comments_version = models.BigIntegerField(
+        verbose_name='Версия комментариев',
+        default=new_version,
+        editable=False
+    )
+
+    objects = VisibleReviewManager()
+    all_objects = ReviewQuerySet.as_manager()
 
     class Meta(AbstractUserContent.Meta):
         verbose_name = 'отзыв'
@@ -178,9 +597,37 @@ class Review(AbstractUserContent):
         constraints = [
             UniqueConstraint(
                 fields=['title', 'author'],
+                condition=Q(is_deleted=False),
                 name='unique_title_author'
             ),
         ]
+        indexes = [
+            Index(
+                fields=('title', '-pub_date', '-id'),
+                name='review_title_pub_date_idx'
+            ),
+            Index(
+                fields=('author', '-pub_date', '-id'),
+                name='review_author_pub_date_idx'
+            ),
+            Index(
+                fields=('title', '-comment_count'),
+                name='review_title_comments_idx'
+            ),
+            Index(
+                fields=('title', '-last_comment_at'),
+                name='review_title_activity_idx'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения обновляется в post_save той же транзакцией.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class VisibleCommentManager(VisibleManagerMixin, models.Manager):
+    hidden_parents = ('review', 'review__title', 'review__author', 'author')
 
 
 class Comment(AbstractUserContent):
@@ -189,8 +636,87 @@ class Comment(AbstractUserContent):
         on_delete=models.CASCADE,
         verbose_name='Отзыв',
     )
+    is_deleted = models.BooleanField(
+        verbose_name='Скрыт до удаления',
+        default=False,
+        editable=False,
+        db_index=True
+    )
+
+    objects = VisibleCommentManager()
+    all_objects = models.Manager()
 
     class Meta(AbstractUserContent.Meta):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         default_related_name = 'comments'
+        indexes = [
+            Index(
+                fields=('review', '-pub_date', '-id'),
+                name='comment_review_pub_date_idx'
+            ),
+            Index(
+                fields=('author', '-pub_date', '-id'),
+                name='comment_author_pub_date_idx'
+            ),
+        ]
+
+
+class OutgoingEmail(models.Model):
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=MODEL_NAME_LENGTH_LIMIT
+    )
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.EmailField(
+        verbose_name='Отправитель',
+        max_length=EMAIL_MAX_LENGTH_LIMIT
+    )
+    to = models.EmailField(
+        verbose_name='Получатель',
+        max_length=EMAIL_MAX_LENGTH_LIMIT
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+    # Пусто, когда письмо отправлено или попытки исчерпаны.
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Следующая попытка',
+        default=timezone.now,
+        null=True
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки',
+        default=0
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Дата отправки',
+        null=True,
+        blank=True
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = 'исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt_at', 'id')
+        indexes = [
+            Index(
+                fields=('next_attempt_at', 'id'),
+                condition=Q(next_attempt_at__isnull=False),
+                name='outgoing_email_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'[:TEXT_LENGTH_LIMIT]
+
+    def to_message(self, connection=None):
+        return EmailMessage(
+            self.subject, self.body, self.from_email, [self.to],
+            connection=connection
+        )
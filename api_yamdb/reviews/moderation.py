@@ -0,0 +1,192 @@
+from collections import Counter
+
+from django.db import transaction
+
+from reviews.cache import (
+    CATALOG_VERSION_KEY, USERS_VERSION_KEY, bump_version_on_commit
+)
+from reviews.models import (
+    CategoryRanking, Comment, GenreRanking, Review, ScoreHistogram, Title,
+    User
+)
+from reviews.signals import suspend_denormalized_updates
+
+
+def rebuild_title_aggregates(title_ids):
+    titles = Title.objects.filter(pk__in=title_ids)
+    titles.rebuild_ratings()
+    titles.refresh_rankings()
+    titles.rebuild_score_histograms()
+
+
+def delete_reviews(reviews):
+    """Удаляет отзывы вместе с комментариями; рейтинги, распределения оценок
+    и места в рейтингах пересчитываются один раз на каждое затронутое
+    произведение.
+    """
+    with transaction.atomic(), suspend_denormalized_updates():
+        affected = list(reviews.values_list('pk', 'title_id'))
+        if not affected:
+            return {}
+        _, deleted = reviews.delete()
+        rebuild_title_aggregates({title_id for _, title_id in affected})
+        bump_version_on_commit(CATALOG_VERSION_KEY)
+    return deleted
+
+
+def delete_comments(comments):
+    """Удаляет комментарии; счётчики пересчитываются один раз на каждый
+    затронутый отзыв.
+    """
+    with transaction.atomic(), suspend_denormalized_updates():
+        affected = list(comments.order_by().values_list(
+            'review_id', 'review__title_id'
+        ).distinct())
+        if not affected:
+            return {}
+        _, deleted = comments.delete()
+        rebuild_comment_stats(affected)
+    return deleted
+
+
+def rebuild_comment_stats(affected):
+    # Счётчик комментариев выводится в отзыве — меняется и версия списка
+    # отзывов произведения.
+    Review.all_objects.filter(
+        pk__in={review_id for review_id, _ in affected}
+    ).rebuild_comment_stats()
+    Title.objects.filter(
+        pk__in={title_id for _, title_id in affected}
+    ).bump_reviews_version()
+
+
+# Мягкое удаление: запрос скрывает только саму строку, а зависящие от неё
+# строки скрыты фильтрами видимых менеджеров. Фоновая очистка
+# purge_deleted порциями исключает их из рейтингов и счётчиков и удаляет,
+# не удерживая блокировку записи надолго.
+
+def hide_reviews(reviews):
+    """Скрывает отзывы и сразу исключает их оценки из рейтингов: работа
+    пропорциональна числу скрываемых отзывов, а не отзывов произведения.
+    """
+    with transaction.atomic():
+        scores = Counter()
+        for pk, title_id, score in reviews.filter(
+            is_deleted=False
+        ).values_list('pk', 'title_id', 'score'):
+            # Отзыв, скрытый параллельным запросом, не вычитается дважды.
+            if Review.all_objects.filter(
+                pk=pk, is_deleted=False
+            ).update(is_deleted=True):
+                scores[title_id, score] += 1
+        for (title_id, score), count in scores.items():
+            Title.all_objects.filter(pk=title_id).update_rating(
+                -score * count, -count
+            )
+            ScoreHistogram.add_score(title_id, score, -count)
+        Title.objects.filter(
+            pk__in={title_id for title_id, _ in scores}
+        ).refresh_rankings()
+        bump_version_on_commit(CATALOG_VERSION_KEY)
+    return sum(scores.values())
+
+
+def hide_comments(comments):
+    with transaction.atomic():
+        counts = Counter()
+        for pk, review_id, title_id in comments.filter(
+            is_deleted=False
+        ).values_list('pk', 'review_id', 'review__title_id'):
+            if Comment.all_objects.filter(
+                pk=pk, is_deleted=False
+            ).update(is_deleted=True):
+                counts[review_id, title_id] += 1
+        for (review_id, _), count in counts.items():
+            Review.all_objects.filter(pk=review_id).remove_comment(count)
+        Title.objects.filter(
+            pk__in={title_id for _, title_id in counts}
+        ).bump_reviews_version()
+    return sum(counts.values())
+
+
+def hide_titles(titles):
+    with transaction.atomic():
+        title_ids = list(titles.values_list('pk', flat=True))
+        hidden = Title.objects.filter(pk__in=title_ids).update(
+            is_deleted=True
+        )
+        CategoryRanking.objects.filter(title_id__in=title_ids).delete()
+        GenreRanking.objects.filter(title_id__in=title_ids).delete()
+        bump_version_on_commit(CATALOG_VERSION_KEY)
+    return hidden
+
+
+def hide_users(users):
+    hidden = User.objects.filter(
+        pk__in=list(users.values_list('pk', flat=True))
+    ).update(is_deleted=True, is_active=False)
+    bump_version_on_commit(USERS_VERSION_KEY)
+    return hidden
+
+
+def delete_hidden(queryset):
+    # Скрытые строки уже исключены из агрегатов и кешей.
+    with transaction.atomic(), suspend_denormalized_updates():
+        _, deleted = queryset.delete()
+    return deleted
+
+
+def hide_hidden_content(queryset):
+    hide = hide_reviews if queryset.model is Review else hide_comments
+    return {queryset.model._meta.label: hide(queryset)}
+
+
+PURGE_HIDDEN = 'Скрыто'
+PURGE_DELETED = 'Удалено'
+
+
+def purge_deleted(batch_size):
+    """Обрабатывает одну порцию и возвращает действие и число строк по
+    моделям; пустой результат — делать больше нечего.
+
+    Сначала скрываются отзывы и комментарии скрытых пользователей с
+    поправкой рейтингов и счётчиков, затем удаляются скрытые строки:
+    зависимые раньше тех, от кого они зависят.
+    """
+    hidden_users = User.all_objects.filter(is_deleted=True)
+    hidden_titles = Title.all_objects.filter(is_deleted=True)
+    hidden_reviews = Review.all_objects.filter(is_deleted=True)
+    steps = (
+        (
+            Comment.all_objects.filter(
+                author__in=hidden_users, is_deleted=False
+            ),
+            hide_hidden_content, PURGE_HIDDEN
+        ),
+        (
+            Review.all_objects.filter(
+                author__in=hidden_users, is_deleted=False
+            ),
+            hide_hidden_content, PURGE_HIDDEN
+        ),
+        (Comment.all_objects.filter(is_deleted=True), delete_hidden,
+         PURGE_DELETED),
+        (Comment.all_objects.filter(review__in=hidden_reviews),
+         delete_hidden, PURGE_DELETED),
+        (Comment.all_objects.filter(review__title__in=hidden_titles),
+         delete_hidden, PURGE_DELETED),
+        (hidden_reviews, delete_hidden, PURGE_DELETED),
+        (Review.all_objects.filter(title__in=hidden_titles), delete_hidden,
+         PURGE_DELETED),
+        (hidden_titles, delete_hidden, PURGE_DELETED),
+        (hidden_users, delete_hidden, PURGE_DELETED),
+    )
+    for queryset, process, action in steps:
+        ids = list(
+            queryset.order_by().values_list('pk', flat=True)[:batch_size]
+        )
+        if ids:
+            return action, process(
+                queryset.model._base_manager.filter(pk__in=ids)
+            )
+    return None, {}
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.utils import timezone
+
+from reviews.constants import (
+    OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_DELAY
+)
+from reviews.models import OutgoingEmail
+
+UPDATE_FIELDS = ('attempts', 'next_attempt_at', 'sent_at', 'last_error')
+
+
+def queue_email(subject, body, to, from_email=None):
+    # Письмо записывается в транзакции вызывающего кода и уходит, только
+    # если она зафиксирована.
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.EMAIL_HOST_USER,
+        to=to
+    )
+
+
+def get_due_emails(batch_size):
+    return list(OutgoingEmail.objects.filter(
+        next_attempt_at__lte=timezone.now()
+    )[:batch_size])
+
+
+def postpone(email, error, now):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    email.next_attempt_at = (
+        now + timedelta(
+            seconds=OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1)
+        ) if email.attempts < OUTBOX_MAX_ATTEMPTS else None
+    )
+
+
+def send_batch(emails, connection):
+    sent = 0
+    now = timezone.now()
+    for email in emails:
+        try:
+            email.to_message(connection).send()
+        except Exception as error:
+            postpone(email, error, now)
+        else:
+            email.attempts += 1
+            email.sent_at = now
+            email.next_attempt_at = None
+            email.last_error = ''
+            sent += 1
+    OutgoingEmail.objects.bulk_update(emails, UPDATE_FIELDS)
+    return sent
+
+
+def drain_outbox(batch_size=OUTBOX_BATCH_SIZE, connection=None):
+    """Отправляет все письма, срок которых подошёл, порциями через одно
+    соединение; неудачные откладываются с экспоненциальной задержкой.
+    Рассчитано на один работающий обработчик.
+
+    Возвращает число отправленных и отложенных писем.
+    """
+    emails = get_due_emails(batch_size)
+    if not emails:
+        return 0, 0
+    connection = connection or get_connection()
+    sent = failed = 0
+    try:
+        connection.open()
+    except Exception as error:
+        now = timezone.now()
+        for email in emails:
+            postpone(email, error, now)
+        OutgoingEmail.objects.bulk_update(emails, UPDATE_FIELDS)
+        return 0, len(emails)
+    try:
+        while emails:
+            batch_sent = send_batch(emails, connection)
+            sent += batch_sent
+            failed += len(emails) - batch_sent
+            emails = get_due_emails(batch_size)
+    finally:
+        connection.close()
+    return sent, failed
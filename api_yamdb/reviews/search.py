@@ -0,0 +1,139 @@
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+from reviews.models import Title, User
+
+TITLE_SEARCH_TABLE = f'{Title._meta.db_table}_fts'
+# Совпадение в названии весит больше, чем в описании.
+TITLE_SEARCH_WEIGHTS = (10.0, 1.0)
+USER_SEARCH_TABLE = f'{User._meta.db_table}_fts'
+TRIGRAM_MIN_SQLITE_VERSION = (3, 34, 0)
+# Триграммный индекс не находит подстроки короче трёх символов.
+TRIGRAM_LENGTH = 3
+# Верхняя граница диапазона строк, начинающихся с префикса: символы
+# имени пользователя заведомо меньше последней кодовой точки Unicode.
+PREFIX_UPPER_BOUND = chr(0x10FFFF)
+
+
+def create_search_index(db, search_table, content_table, columns,
+                        tokenize):
+    with db.cursor() as cursor:
+        if search_table in db.introspection.table_names(cursor):
+            return
+        names = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        # Внешний контент: FTS5 хранит только индекс, а триггеры
+        # синхронизируют его при любых изменениях исходной таблицы.
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE {search_table} USING fts5('
+            f"{names}, content='{content_table}', "
+            f"content_rowid='id', tokenize='{tokenize}')"
+        )
+        cursor.execute(
+            f'CREATE TRIGGER {search_table}_ai '
+            f'AFTER INSERT ON {content_table} BEGIN '
+            f'INSERT INTO {search_table}(rowid, {names}) '
+            f'VALUES (new.id, {new_values}); END'
+        )
+        cursor.execute(
+            f'CREATE TRIGGER {search_table}_ad '
+            f'AFTER DELETE ON {content_table} BEGIN '
+            f'INSERT INTO {search_table}({search_table}, rowid, {names}) '
+            f"VALUES ('delete', old.id, {old_values}); END"
+        )
+        cursor.execute(
+            f'CREATE TRIGGER {search_table}_au '
+            f'AFTER UPDATE OF {names} ON {content_table} BEGIN '
+            f'INSERT INTO {search_table}({search_table}, rowid, {names}) '
+            f"VALUES ('delete', old.id, {old_values}); "
+            f'INSERT INTO {search_table}(rowid, {names}) '
+            f'VALUES (new.id, {new_values}); END'
+        )
+        cursor.execute(
+            f'INSERT INTO {search_table}({search_table}) '
+            "VALUES ('rebuild')"
+        )
+
+
+def create_title_search_index(using='default', **kwargs):
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    create_search_index(
+        db, TITLE_SEARCH_TABLE, Title._meta.db_table,
+        ('name', 'description'), 'unicode61 remove_diacritics 2'
+    )
+
+
+def has_user_search_index(db):
+    # Токенизатор trigram появился в SQLite 3.34.
+    return (
+        db.vendor == 'sqlite'
+        and db.Database.sqlite_version_info >= TRIGRAM_MIN_SQLITE_VERSION
+    )
+
+
+def create_user_search_index(using='default', **kwargs):
+    db = connections[using]
+    if not has_user_search_index(db):
+        return
+    create_search_index(
+        db, USER_SEARCH_TABLE, User._meta.db_table,
+        ('username_lower',), 'trigram'
+    )
+
+
+def get_match_query(query):
+    return ' '.join(
+        '"{}"*'.format(term.replace('"', '""')) for term in query.split()
+    )
+
+
+def search_titles(queryset, query):
+    match_query = get_match_query(query)
+    if not match_query:
+        return queryset
+    if connections[queryset.db].vendor != 'sqlite':
+        return queryset.filter(name__icontains=query)
+    title_table = Title._meta.db_table
+    weights = ', '.join(str(weight) for weight in TITLE_SEARCH_WEIGHTS)
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {TITLE_SEARCH_TABLE} '
+        f'WHERE {TITLE_SEARCH_TABLE} MATCH %s',
+        (match_query,)
+    )).annotate(search_rank=RawSQL(
+        f'SELECT bm25({TITLE_SEARCH_TABLE}, {weights}) '
+        f'FROM {TITLE_SEARCH_TABLE} WHERE {TITLE_SEARCH_TABLE} MATCH %s '
+        f'AND rowid = "{title_table}"."id"',
+        (match_query,)
+    )).order_by('search_rank', *queryset.query.order_by)
+
+
+def search_users(queryset, query, prefix=False):
+    """Ищет пользователей по подстроке имени без учёта регистра, а при
+    prefix=True — по началу имени.
+    """
+    query = query.strip().lower()
+    if not query:
+        return queryset
+    db = connections[queryset.db]
+    if not prefix:
+        if has_user_search_index(db) and len(query) >= TRIGRAM_LENGTH:
+            queryset = queryset.filter(pk__in=RawSQL(
+                f'SELECT rowid FROM {USER_SEARCH_TABLE} '
+                f'WHERE {USER_SEARCH_TABLE} MATCH %s',
+                ('"{}"'.format(query.replace('"', '""')),)
+            ))
+        else:
+            queryset = queryset.filter(username_lower__contains=query)
+    elif db.vendor == 'sqlite':
+        # LIKE в SQLite не использует обычный индекс, а сравнение
+        # диапазоном использует.
+        queryset = queryset.filter(
+            username_lower__gte=query,
+            username_lower__lt=query + PREFIX_UPPER_BOUND
+        )
+    else:
+        queryset = queryset.filter(username_lower__startswith=query)
+    return queryset.order_by('username_lower', 'pk')
@@ -0,0 +1,193 @@
+from contextlib import contextmanager
+from threading import local
+
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_save
+)
+from django.dispatch import receiver
+
+from reviews.cache import (
+    USERS_VERSION_KEY, bump_catalog_version_on_commit, bump_version_on_commit
+)
+from reviews.models import (
+    Category, CategoryRanking, Comment, Genre, GenreRanking, Review,
+    ScoreHistogram, Title, User
+)
+from reviews.user_cache import user_cache
+
+
+_state = local()
+
+
+@contextmanager
+def suspend_denormalized_updates():
+    # Массовые операции сами пересчитывают агрегаты и версии кеша один раз
+    # на весь набор строк, а не построчно в обработчиках ниже.
+    previous = updates_suspended()
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def updates_suspended():
+    return getattr(_state, 'suspended', False)
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    instance._previous_rating_state = None
+    if instance.pk is not None:
+        instance._previous_rating_state = Review.all_objects.filter(
+            pk=instance.pk
+        ).values_list('title_id', 'score').first()
+
+
+def add_review_score(title_id, score):
+    Title.objects.filter(pk=title_id).update_rating(score, 1)
+    ScoreHistogram.add_score(title_id, score, 1)
+
+
+def remove_review_score(title_id, score):
+    Title.objects.filter(pk=title_id).update_rating(-score, -1)
+    ScoreHistogram.add_score(title_id, score, -1)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else instance._previous_rating_state
+    if previous == (instance.title_id, instance.score):
+        # Рейтинг не изменился, но список отзывов произведения — да.
+        Title.objects.filter(pk=instance.title_id).bump_reviews_version()
+        return
+    title_ids = {instance.title_id}
+    if previous is not None:
+        remove_review_score(*previous)
+        title_ids.add(previous[0])
+    add_review_score(instance.title_id, instance.score)
+    Title.objects.filter(pk__in=title_ids).refresh_rankings()
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    # Оценка скрытого отзыва уже исключена из рейтинга при скрытии.
+    if updates_suspended() or instance.is_deleted:
+        return
+    remove_review_score(instance.title_id, instance.score)
+    Title.objects.filter(pk=instance.title_id).refresh_rankings()
+
+
+@receiver(post_save, sender=Title)
+def refresh_rankings_on_title_save(sender, instance, created, raw=False,
+                                   **kwargs):
+    if raw:
+        return
+    if created:
+        ScoreHistogram.objects.create(title=instance)
+    else:
+        Title.objects.filter(pk=instance.pk).refresh_rankings()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def refresh_rankings_on_genre_change(sender, instance, action, reverse,
+                                     pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        Title.objects.filter(pk=instance.pk).refresh_rankings()
+    elif pk_set:
+        Title.objects.filter(pk__in=pk_set).refresh_rankings()
+    else:
+        GenreRanking.objects.filter(genre=instance).delete()
+
+
+@receiver(post_delete, sender=Title)
+def delete_title_rankings(sender, instance, **kwargs):
+    CategoryRanking.objects.filter(title_id=instance.pk).delete()
+    GenreRanking.objects.filter(title_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_catalog_version_on_change(sender, **kwargs):
+    if updates_suspended():
+        return
+    bump_catalog_version_on_commit()
+
+
+def bump_comment_title_reviews_version(comment):
+    # Счётчик комментариев выводится в отзыве — список отзывов тоже меняется.
+    Title.objects.filter(reviews=comment.review_id).bump_reviews_version()
+
+
+@receiver(post_save, sender=Comment)
+def add_review_comment(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    reviews = Review.all_objects.filter(pk=instance.review_id)
+    if not created:
+        reviews.bump_comments_version()
+        return
+    reviews.add_comment(instance.pub_date)
+    bump_comment_title_reviews_version(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def remove_review_comment(sender, instance, **kwargs):
+    if updates_suspended():
+        return
+    # При каскадном удалении отзыва комментарии удаляются раньше него,
+    # так что обновление счётчика безвредно.
+    Review.all_objects.filter(pk=instance.review_id).remove_comment()
+    bump_comment_title_reviews_version(instance)
+
+
+# Поля, которые попадают в токен доступа при выдаче.
+USER_TOKEN_FIELDS = ('username', 'role', 'is_staff', 'is_superuser',
+                     'is_active')
+
+
+def get_user_token_state(user):
+    return tuple(getattr(user, field) for field in USER_TOKEN_FIELDS)
+
+
+@receiver(pre_save, sender=User)
+def remember_user_token_state(sender, instance, update_fields=None,
+                              **kwargs):
+    instance._previous_token_state = get_user_token_state(instance)
+    if instance.pk is not None and (
+        update_fields is None
+        or set(update_fields) & set(USER_TOKEN_FIELDS)
+    ):
+        instance._previous_token_state = User.all_objects.filter(
+            pk=instance.pk
+        ).values_list(*USER_TOKEN_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def bump_users_version_on_change(sender, instance, created, **kwargs):
+    previous = instance._previous_token_state
+    current = get_user_token_state(instance)
+    if created or previous == current:
+        return
+    if previous is None or previous[:2] != current[:2]:
+        user_cache.invalidate(instance.pk)
+    # Выданные токены с прежними правами перестают считаться актуальными,
+    # а кеши пользователей других процессов сбрасываются.
+    bump_version_on_commit(USERS_VERSION_KEY)
+
+
+@receiver(post_delete, sender=User)
+def bump_users_version_on_delete(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+    bump_version_on_commit(USERS_VERSION_KEY)
@@ -0,0 +1,111 @@
+from collections import OrderedDict, namedtuple
+from threading import Lock
+from time import monotonic
+
+from reviews.cache import USERS_VERSION_KEY, get_version
+from reviews.constants import USER_CACHE_SIZE, USER_CACHE_TIMEOUT
+from reviews.models import User
+
+CachedUser = namedtuple('CachedUser', ('id', 'username', 'role'))
+
+
+class LRUCache:
+    """Кеш в памяти процесса: не больше max_size записей, давно не
+    использованные вытесняются первыми, запись живёт не дольше timeout.
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < monotonic():
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (monotonic() + self.timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else None,
+            }
+
+
+class UserCache:
+    """Имена и роли пользователей по id для вывода авторов без JOIN.
+
+    Изменения в этом процессе сбрасывают запись сигналами, а в других
+    процессах — через версию USERS_VERSION_KEY общего кеша, которую
+    сигналы увеличивают после фиксации транзакции.
+    """
+
+    def __init__(self, max_size, timeout):
+        self.entries = LRUCache(max_size, timeout)
+        self.version = None
+
+    def check_version(self):
+        version = get_version(USERS_VERSION_KEY)
+        if version != self.version:
+            self.entries.clear()
+            self.version = version
+
+    def get_many(self, user_ids):
+        self.check_version()
+        users = {}
+        missing = []
+        for user_id in set(user_ids):
+            user = self.entries.get(user_id)
+            if user is None:
+                missing.append(user_id)
+            else:
+                users[user_id] = user
+        if missing:
+            # Скрытые пользователи ещё выводятся авторами до очистки.
+            for user in User.all_objects.filter(
+                pk__in=missing
+            ).order_by().values_list('pk', 'username', 'role', named=True):
+                users[user.pk] = CachedUser(*user)
+                self.entries.set(user.pk, users[user.pk])
+        return users
+
+    def get(self, user_id):
+        return self.get_many((user_id,)).get(user_id)
+
+    def invalidate(self, user_id):
+        self.entries.delete(user_id)
+
+    def stats(self):
+        return {**self.entries.stats(), 'version': self.version}
+
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TIMEOUT)
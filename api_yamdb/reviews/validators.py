@@ -7,10 +7,14 @@ from django.core.exceptions import ValidationError
 from reviews.constants import NAME_MAX_LENGTH_LIMIT, EMAIL_MAX_LENGTH_LIMIT
 
 
+# Совпадают с адресами действий в /api/v1/users/.
+RESERVED_USERNAMES = ('me', 'cache-stats')
+
+
 def validate_username(value):
     pattern = re.compile(r'^[\w.@+-]+\Z')
     if (
-            value.lower() != "me"
+            value.lower() not in RESERVED_USERNAMES
             and pattern.match(value)
             and len(value) < NAME_MAX_LENGTH_LIMIT):
         return value
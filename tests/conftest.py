@@ -1,8 +1,12 @@
 import os
 import sys
 
+import pytest
+from django.core.cache import cache, caches
 from django.utils.version import get_version
 
+from reviews.cache import VERSIONS_CACHE_ALIAS
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR)
 
@@ -32,4 +36,36 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 
 pytest_plugins = [
     'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_catalog',
 ]
+
+
+@pytest.fixture(scope='session', autouse=True)
+def versions_cache_location(tmp_path_factory):
+    from django.conf import settings
+
+    settings.CACHES['versions']['LOCATION'] = str(
+        tmp_path_factory.mktemp('versions')
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(versions_cache_location):
+    cache.clear()
+    caches[VERSIONS_CACHE_ALIAS].clear()
+    yield
+    cache.clear()
+    caches[VERSIONS_CACHE_ALIAS].clear()
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix,
+                                 tmp_path_factory):
+    # Файловая тестовая БД: в разделяемой in-memory БД SQLite конкурентные
+    # записи из разных потоков сразу падают с "table is locked" вместо
+    # ожидания блокировки, как в рабочей БД.
+    from django.conf import settings
+
+    settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = str(
+        tmp_path_factory.mktemp('db') / 'test.sqlite3'
+    )
@@ -0,0 +1,24 @@
+import pytest
+
+from reviews.models import Category, Title, User
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name='Фильм', slug='films')
+
+
+@pytest.fixture
+def title(category):
+    return Title.objects.create(name='Тест', year=2000, category=category)
+
+
+@pytest.fixture
+def make_authors():
+    def make_authors(count):
+        return [
+            User.objects.create(username=f'author{idx}',
+                                email=f'author{idx}@yamdb.fake')
+            for idx in range(count)
+        ]
+    return make_authors
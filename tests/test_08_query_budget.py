@@ -0,0 +1,114 @@
+import pytest
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.user_cache import user_cache
+
+
+PAGE_SIZES = (10, 100, 1000)
+
+# Эндпоинт и допустимое число запросов к БД при любом размере страницы.
+ANONYMOUS_QUERY_BUDGETS = (
+    ('/api/v1/titles/', 3),
+    ('/api/v1/titles/{title_id}/', 2),
+    ('/api/v1/categories/', 2),
+    ('/api/v1/genres/', 2),
+    # Родитель списка читается вместе с версией списка для ETag.
+    ('/api/v1/titles/{title_id}/reviews/', 3),
+    ('/api/v1/titles/{title_id}/reviews/{review_id}/', 1),
+    ('/api/v1/titles/{title_id}/reviews/{review_id}/comments/', 3),
+    (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        '{comment_id}/',
+        1
+    ),
+)
+ADMIN_QUERY_BUDGETS = (
+    ('/api/v1/users/', 3),
+    ('/api/v1/users/{username}/', 2),
+    ('/api/v1/users/me/', 1),
+)
+
+
+def create_catalog(size, admin):
+    Category.objects.bulk_create(
+        Category(name=f'Категория {idx}', slug=f'category-{idx}')
+        for idx in range(size)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(size)
+    )
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {idx}', year=2000, category=category)
+        for idx, category in enumerate(Category.objects.all())
+    )
+    genres = (Genre.objects.first(), Genre.objects.last())
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title_id=title.pk, genre_id=genre.pk)
+        for title in Title.objects.all()
+        for genre in genres
+    )
+    User.objects.bulk_create(
+        User(username=f'author{idx}', email=f'author{idx}@yamdb.fake')
+        for idx in range(size)
+    )
+    authors = User.objects.filter(username__startswith='author')
+    title = Title.objects.first()
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text='Отзыв', score=5)
+        for author in authors
+    )
+    review = Review.objects.filter(title=title).first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author=author, text='Комментарий')
+        for author in authors
+    )
+    return {
+        'title_id': title.pk,
+        'review_id': review.pk,
+        'comment_id': review.comments.first().pk,
+        'username': admin.username,
+    }
+
+
+def check_query_budget(django_assert_max_num_queries, client, url, budget,
+                       page_size):
+    with django_assert_max_num_queries(budget):
+        response = client.get(url, {'limit': page_size})
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со статусом '
+        '200.'
+    )
+    data = response.json()
+    if 'results' in data:
+        assert len(data['results']) == page_size, (
+            f'Проверьте, что GET-запрос к `{url}` с параметром '
+            f'`limit={page_size}` возвращает {page_size} объектов.'
+        )
+
+
+@pytest.mark.django_db
+class Test08QueryBudget:
+
+    @pytest.mark.parametrize('page_size', PAGE_SIZES)
+    def test_01_anonymous_endpoints(self, client, admin, page_size,
+                                    django_assert_max_num_queries):
+        kwargs = create_catalog(page_size, admin)
+        # Авторы выводятся из кеша пользователей процесса; на холодном
+        # кеше страница стоит ещё одного запроса.
+        user_cache.get_many(User.objects.values_list('pk', flat=True))
+        for url_template, budget in ANONYMOUS_QUERY_BUDGETS:
+            check_query_budget(
+                django_assert_max_num_queries, client,
+                url_template.format(**kwargs), budget, page_size
+            )
+
+    @pytest.mark.parametrize('page_size', PAGE_SIZES)
+    def test_02_admin_endpoints(self, admin_client, admin, page_size,
+                                django_assert_max_num_queries):
+        kwargs = create_catalog(page_size - 1, admin)
+        for url_template, budget in ADMIN_QUERY_BUDGETS:
+            check_query_budget(
+                django_assert_max_num_queries, admin_client,
+                url_template.format(**kwargs), budget, page_size
+            )
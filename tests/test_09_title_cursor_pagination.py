@@ -0,0 +1,107 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+
+
+RATINGS = (None, 7.5, 10.0, None, 7.5, 3.0, 7.5, None, 10.0, 1.0, 3.0)
+
+
+def create_rated_titles(category):
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {idx}', year=2000, category=category)
+        for idx in range(len(RATINGS))
+    )
+    for title, rating in zip(Title.objects.order_by('id'), RATINGS):
+        Title.objects.filter(pk=title.pk).update(rating=rating)
+    rated = sorted(
+        ((rating, pk) for pk, rating in Title.objects.exclude(
+            rating=None
+        ).values_list('id', 'rating')),
+        reverse=True
+    )
+    unrated = Title.objects.filter(rating=None).order_by('-id')
+    return [pk for _, pk in rated] + list(unrated.values_list('id', flat=True))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleCursorPagination:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_cursor_walk(self, client, category,
+                            django_assert_max_num_queries):
+        expected_ids = create_rated_titles(category)
+        url = f'{self.TITLES_URL}?cursor=&limit=3'
+        pages = []
+        while url:
+            # На границе оценённых и неоценённых произведений строки
+            # читаются двумя запросами.
+            with django_assert_max_num_queries(3):
+                response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с '
+                'параметром `cursor` возвращает ответ со статусом 200.'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что курсорная пагинация не выполняет COUNT.'
+            )
+            pages.append([title['id'] for title in data['results']])
+            url = data['next']
+        assert sum(pages, []) == expected_ids, (
+            'Проверьте, что курсорная пагинация возвращает произведения по '
+            'убыванию рейтинга, а произведения без оценок — в конце.'
+        )
+
+        url = data['previous']
+        previous_pages = []
+        while url:
+            data = client.get(url).json()
+            previous_pages.insert(
+                0, [title['id'] for title in data['results']]
+            )
+            url = data['previous']
+        assert sum(previous_pages, []) == sum(pages[:-1], []), (
+            'Проверьте, что ссылка `previous` курсорной пагинации '
+            'возвращает предыдущие страницы в том же порядке.'
+        )
+
+    def test_02_offset_pagination_kept(self, client, category):
+        expected_ids = create_rated_titles(category)
+        data = client.get(self.TITLES_URL, {'limit': 4, 'offset': 4}).json()
+        assert data['count'] == len(expected_ids)
+        assert [title['id'] for title in data['results']] == (
+            expected_ids[4:8]
+        ), (
+            f'Проверьте, что для `{self.TITLES_URL}` без параметра `cursor` '
+            'сохранилась пагинация limit/offset с тем же порядком.'
+        )
+
+    def test_03_invalid_cursor(self, client, category):
+        create_rated_titles(category)
+        response = client.get(self.TITLES_URL, {'cursor': 'cD1hYmM='})
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('page', (1, 3))
+    def test_04_query_plan_seeks_index(self, client, category, page):
+        create_rated_titles(category)
+        url = f'{self.TITLES_URL}?cursor=&limit=2&fields=id,rating'
+        for _ in range(page):
+            url = client.get(url).json()['next']
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        assert context.captured_queries
+        for query in context.captured_queries:
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+                plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+            assert 'SEARCH' in plan and 'title_rating_id_idx' in plan, (
+                f'Проверьте, что страница `{self.TITLES_URL}` ищет начало '
+                f'диапазона по индексу `title_rating_id_idx`: {plan}'
+            )
+            assert 'TEMP B-TREE' not in plan, (
+                f'Проверьте, что страница `{self.TITLES_URL}` не '
+                f'сортируется отдельно от индекса: {plan}'
+            )
@@ -0,0 +1,85 @@
+import pytest
+
+from reviews.constants import RATING_PRIOR_MEAN, RATING_PRIOR_WEIGHT
+from reviews.models import Genre, Review, Title
+
+
+def create_scored_titles(category, authors):
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    titles = {}
+    for name, scores in (
+        ('single', (10,)),
+        ('popular', (9, 9, 9, 8, 9)),
+        ('average', (5, 6)),
+    ):
+        title = Title.objects.create(name=name, year=2000, category=category)
+        title.genre.set([drama])
+        for author, score in zip(authors, scores):
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score
+            )
+        titles[name] = title
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10Leaderboard:
+
+    URLS = ('/api/v1/categories/films/top/', '/api/v1/genres/drama/top/')
+
+    def test_01_bayesian_order(self, client, category, make_authors,
+                               django_assert_max_num_queries):
+        titles = create_scored_titles(category, make_authors(5))
+        for url in self.URLS:
+            with django_assert_max_num_queries(3):
+                response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+                'статусом 200.'
+            )
+            data = response.json()
+            assert [item['title']['name'] for item in data] == [
+                'popular', 'single', 'average'
+            ], (
+                f'Проверьте, что `{url}` упорядочивает произведения по '
+                'взвешенному рейтингу: одна оценка 10 не выигрывает у '
+                'множества высоких оценок.'
+            )
+            assert data[1]['weighted_rating'] == pytest.approx(
+                (RATING_PRIOR_WEIGHT * RATING_PRIOR_MEAN + 10)
+                / (RATING_PRIOR_WEIGHT + 1)
+            )
+            assert data[0]['title']['id'] == titles['popular'].pk
+
+    def test_02_incremental_refresh(self, client, category,
+                                    make_authors):
+        titles = create_scored_titles(category, make_authors(5))
+        Review.objects.filter(title=titles['popular']).delete()
+        review = Review.objects.get(title=titles['average'], score=5)
+        review.score = 10
+        review.save()
+        titles['single'].genre.clear()
+
+        names = [item['title']['name']
+                 for item in client.get(self.URLS[0]).json()]
+        assert names == ['average', 'single'], (
+            'Проверьте, что рейтинг категории обновляется при изменении и '
+            'удалении отзывов.'
+        )
+        names = [item['title']['name']
+                 for item in client.get(self.URLS[1]).json()]
+        assert names == ['average'], (
+            'Проверьте, что рейтинг жанра обновляется при изменении жанров '
+            'произведения.'
+        )
+
+        titles['average'].delete()
+        names = [item['title']['name']
+                 for item in client.get(self.URLS[0]).json()]
+        assert names == ['single']
+
+    def test_03_limit(self, client, category, make_authors):
+        create_scored_titles(category, make_authors(5))
+        assert len(client.get(self.URLS[0], {'limit': 1}).json()) == 1
+        assert client.get(self.URLS[0], {'limit': 0}).status_code == 400
+        assert client.get(self.URLS[0], {'limit': 'x'}).status_code == 400
@@ -0,0 +1,87 @@
+import pytest
+
+from reviews.models import Genre, Review
+from tests.utils import run_in_other_process
+
+
+@pytest.fixture(params=('locmem', 'filebased'))
+def cache_backend(request, settings, tmp_path):
+    backend = {
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'filebased': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path / 'cache'),
+        },
+    }[request.param]
+    settings.CACHES = {**settings.CACHES, 'default': backend}
+    return request.param
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleListCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    STATS_URL = '/api/v1/titles/cache-stats/'
+
+    def test_01_hits_and_invalidation(self, cache_backend, client,
+                                      admin_client, admin, title):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title.genre.set([genre])
+
+        first = client.get(
+            self.TITLES_URL, {'genre': 'drama', 'limit': 5, 'unknown': 1}
+        ).json()
+        assert first['results'][0]['rating'] is None
+        second = client.get(
+            f'{self.TITLES_URL}?limit=5&genre=drama'
+        ).json()
+        assert second == first
+        stats = admin_client.get(self.STATS_URL).json()
+        assert (stats['hits'], stats['misses']) == (1, 1), (
+            'Проверьте, что повторный запрос с теми же параметрами '
+            'фильтрации и пагинации отдаётся из кеша.'
+        )
+
+        Review.objects.create(title=title, author=admin, text='Отзыв',
+                              score=7)
+        third = client.get(
+            self.TITLES_URL, {'genre': 'drama', 'limit': 5}
+        ).json()
+        assert third['results'][0]['rating'] == 7, (
+            'Проверьте, что кеш списка произведений сбрасывается при '
+            'изменении отзывов.'
+        )
+        stats = admin_client.get(self.STATS_URL).json()
+        assert (stats['hits'], stats['misses']) == (1, 2)
+
+        assert client.get(self.TITLES_URL).json()['results'][0]['genre']
+        genre.delete()
+        data = client.get(self.TITLES_URL).json()
+        assert data['results'][0]['genre'] == [], (
+            'Проверьте, что кеш списка произведений сбрасывается при '
+            'удалении жанра.'
+        )
+
+    def test_02_stats_admin_only(self, cache_backend, client, user_client):
+        assert client.get(self.STATS_URL).status_code == 401
+        assert user_client.get(self.STATS_URL).status_code == 403
+
+    def test_03_other_process_change(self, client, title):
+        assert client.get(self.TITLES_URL).json()['results'][0][
+            'name'
+        ] == 'Тест'
+
+        def rename():
+            title.name = 'Новое название'
+            title.save()
+
+        run_in_other_process(rename)
+        assert client.get(self.TITLES_URL).json()['results'][0][
+            'name'
+        ] == 'Новое название', (
+            'Проверьте, что изменение каталога в другом процессе сбрасывает '
+            'кеш списка произведений этого процесса: версия каталога должна '
+            'храниться в общем кеше `versions`.'
+        )
@@ -0,0 +1,53 @@
+import pytest
+
+from reviews.models import Category, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def search(self, client, query):
+        response = client.get(self.TITLES_URL, {'search': query})
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с параметром '
+            '`search` возвращает ответ со статусом 200.'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_unicode_case_folding(self, client):
+        category = Category.objects.create(name='Фильм', slug='films')
+        Title.objects.create(name='Побег из Шоушенка', year=1994,
+                             category=category)
+        Title.objects.create(name='Крёстный отец', year=1972,
+                             category=category)
+        assert self.search(client, 'шоушенк') == ['Побег из Шоушенка'], (
+            'Проверьте, что поиск по названию не зависит от регистра '
+            'кириллических букв и ищет по началу слова.'
+        )
+        assert self.search(client, 'ПОБЕГ ИЗ') == ['Побег из Шоушенка']
+        assert self.search(client, 'КРЁСТНЫЙ') == ['Крёстный отец']
+        assert self.search(client, '"') == []
+
+    def test_02_relevance_and_sync(self, client):
+        category = Category.objects.create(name='Фильм', slug='films')
+        described = Title.objects.create(
+            name='Зелёная миля', year=1999, category=category,
+            description='Тюремная драма'
+        )
+        named = Title.objects.create(name='Тюремная драма', year=2000,
+                                     category=category)
+        assert self.search(client, 'тюремная') == [
+            named.name, described.name
+        ], (
+            'Проверьте, что результаты поиска упорядочены по релевантности: '
+            'совпадение в названии выше совпадения в описании.'
+        )
+
+        named.name = 'Остров проклятых'
+        named.save()
+        assert self.search(client, 'тюремная') == [described.name]
+        assert self.search(client, 'остров') == [named.name]
+        described.delete()
+        assert self.search(client, 'тюремная') == []
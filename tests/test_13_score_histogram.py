@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from reviews.constants import MAX_RATING_VALUE, MIN_RATING_VALUE
+from reviews.models import Review, ScoreHistogram, Title, TitleQuerySet
+
+THREADS_COUNT = 4
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ScoreHistogram:
+
+    HISTOGRAM_URL_TEMPLATE = '/api/v1/titles/{title_id}/histogram/'
+
+    def get_scores(self, client, title_id):
+        response = client.get(
+            self.HISTOGRAM_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что GET-запрос к '
+            f'`{self.HISTOGRAM_URL_TEMPLATE}` возвращает ответ со статусом '
+            '200.'
+        )
+        return response.json()['scores']
+
+    def test_01_incremental_counters(self, client, title, make_authors,
+                                     django_assert_num_queries):
+        other_title = Title.objects.create(name='Другое', year=2000,
+                                           category=title.category)
+        authors = make_authors(3)
+        reviews = [
+            Review.objects.create(title=title, author=author, text='Отзыв',
+                                  score=score)
+            for author, score in zip(authors, (10, 10, 3))
+        ]
+        reviews[2].score = 7
+        reviews[2].save()
+        reviews[1].delete()
+        reviews[0].title = other_title
+        reviews[0].save()
+
+        with django_assert_num_queries(1):
+            scores = self.get_scores(client, title.pk)
+        expected = {
+            str(score): 0
+            for score in range(MIN_RATING_VALUE, MAX_RATING_VALUE + 1)
+        }
+        assert scores == {**expected, '7': 1}, (
+            'Проверьте, что распределение оценок обновляется при создании, '
+            'изменении и удалении отзывов.'
+        )
+        assert self.get_scores(client, other_title.pk) == {
+            **expected, '10': 1
+        }
+
+    def test_02_missing_histogram_rebuilt(self, client, admin, title):
+        Review.objects.create(title=title, author=admin, text='Отзыв',
+                              score=4)
+        ScoreHistogram.objects.all().delete()
+        assert self.get_scores(client, title.pk)['4'] == 1
+        response = client.get(self.HISTOGRAM_URL_TEMPLATE.format(
+            title_id=title.pk + 100
+        ))
+        assert response.status_code == 404
+
+    def test_03_concurrent_rebuilds(self, admin, title, monkeypatch):
+        Review.objects.create(title=title, author=admin, text='Отзыв',
+                              score=4)
+        ScoreHistogram.objects.all().delete()
+        url = self.HISTOGRAM_URL_TEMPLATE.format(title_id=title.pk)
+        barrier = threading.Barrier(THREADS_COUNT)
+        original = TitleQuerySet.rebuild_score_histograms
+
+        def rebuild_score_histograms(queryset):
+            # Все запросы уже не нашли распределение и пересчитывают его.
+            barrier.wait(timeout=5)
+            return original(queryset)
+
+        monkeypatch.setattr(TitleQuerySet, 'rebuild_score_histograms',
+                            rebuild_score_histograms)
+        results = []
+
+        def get_histogram():
+            try:
+                response = APIClient().get(url)
+                results.append(
+                    (response.status_code, response.json()['scores']['4'])
+                )
+            except Exception as error:
+                results.append(type(error).__name__)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=get_histogram)
+            for _ in range(THREADS_COUNT)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [(200, 1)] * THREADS_COUNT, (
+            'Проверьте, что одновременные первые запросы распределения '
+            'оценок не падают на повторной вставке.'
+        )
+        assert ScoreHistogram.objects.filter(title=title).count() == 1
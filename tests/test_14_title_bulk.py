@@ -0,0 +1,125 @@
+import pytest
+
+from reviews import cache
+from reviews.models import Category, Genre, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleBulk:
+
+    BULK_URL = '/api/v1/titles/bulk/'
+
+    @pytest.fixture
+    def catalog(self):
+        Category.objects.create(name='Фильм', slug='films')
+        Category.objects.create(name='Книга', slug='books')
+        Genre.objects.create(name='Драма', slug='drama')
+        Genre.objects.create(name='Комедия', slug='comedy')
+
+    def test_01_bulk_create(self, admin_client, catalog, monkeypatch,
+                            django_assert_max_num_queries):
+        data = [
+            {
+                'name': f'Произведение {idx}',
+                'year': 1950 + idx % 70,
+                'category': 'films',
+                'genre': ['drama', 'comedy'],
+            } for idx in range(500)
+        ]
+        bumps = []
+        monkeypatch.setattr(cache, 'bump_version',
+                            lambda *keys: bumps.append(keys))
+        # Число запросов растёт с числом порций вставки, а не с числом
+        # произведений.
+        with django_assert_max_num_queries(40):
+            response = admin_client.post(self.BULK_URL, data, format='json')
+        assert response.status_code == 201, (
+            f'Проверьте, что POST-запрос администратора к `{self.BULK_URL}` '
+            'с корректными данными возвращает ответ со статусом 201.'
+        )
+        result = response.json()
+        assert [title['name'] for title in result] == [
+            item['name'] for item in data
+        ]
+        assert {genre['slug'] for genre in result[0]['genre']} == {
+            'drama', 'comedy'
+        }
+        assert bumps == [(cache.CATALOG_VERSION_KEY,)], (
+            'Проверьте, что массовая загрузка меняет версию каталога один '
+            'раз, а не для каждого произведения.'
+        )
+        assert Title.objects.count() == 500
+        assert Title.genre.through.objects.count() == 1000
+        names = dict(Title.objects.values_list('pk', 'name'))
+        assert all(
+            names[title['id']] == title['name'] for title in result
+        ), (
+            'Проверьте, что ответ содержит id созданных произведений, а не '
+            'других строк таблицы.'
+        )
+
+    def test_02_bulk_create_errors(self, admin_client, user_client, catalog):
+        data = [
+            {'name': 'Верно', 'year': 2000, 'category': 'films',
+             'genre': ['drama']},
+            {'name': 'Нет категории', 'year': 2000, 'category': 'music',
+             'genre': ['drama']},
+            {'name': 'Нет жанра', 'year': 2000, 'category': 'films',
+             'genre': ['horror']},
+        ]
+        response = admin_client.post(self.BULK_URL, data, format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert set(errors[1]) == {'category'}
+        assert set(errors[2]) == {'genre'}, (
+            'Проверьте, что ошибки массовой загрузки возвращаются отдельно '
+            'для каждого элемента.'
+        )
+        response = admin_client.post(self.BULK_URL, [
+            *data[:1],
+            {'name': 'Из будущего', 'year': 3000, 'category': 'films',
+             'genre': ['drama']},
+        ], format='json')
+        assert response.status_code == 400
+        assert set(response.json()[1]) == {'year'}
+        assert not Title.objects.exists(), (
+            'Проверьте, что при ошибке в любом элементе массовая загрузка '
+            'не сохраняет ни одного произведения.'
+        )
+        response = user_client.post(self.BULK_URL, data[:1], format='json')
+        assert response.status_code == 403
+
+    def test_03_bulk_partial_update(self, admin_client, catalog):
+        titles = admin_client.post(self.BULK_URL, [
+            {'name': f'Произведение {idx}', 'year': 2000,
+             'category': 'films', 'genre': ['drama']}
+            for idx in range(3)
+        ], format='json').json()
+        response = admin_client.patch(self.BULK_URL, [
+            {'id': titles[0]['id'], 'year': 1999},
+            {'id': titles[1]['id'], 'category': 'books',
+             'genre': ['comedy', 'drama']},
+        ], format='json')
+        assert response.status_code == 200, (
+            f'Проверьте, что PATCH-запрос администратора к `{self.BULK_URL}` '
+            'с корректными данными возвращает ответ со статусом 200.'
+        )
+        first = Title.objects.get(pk=titles[0]['id'])
+        second = Title.objects.get(pk=titles[1]['id'])
+        assert (first.year, first.name) == (1999, 'Произведение 0')
+        assert second.category.slug == 'books'
+        assert set(second.genre.values_list('slug', flat=True)) == {
+            'comedy', 'drama'
+        }
+
+        response = admin_client.patch(self.BULK_URL, [
+            {'id': titles[2]['id'], 'name': 'Новое имя'},
+            {'id': titles[2]['id'], 'year': 1990},
+            {'id': 0, 'year': 1990},
+        ], format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {} and set(errors[1]) == {'id'}
+        assert set(errors[2]) == {'id'}
+        assert Title.objects.get(pk=titles[2]['id']).name == 'Произведение 2'
@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Genre, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15SparseFieldsets:
+
+    @pytest.fixture
+    def review(self, admin, category):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title = Title.objects.create(name='Тест', year=2000,
+                                     category=category, description='Текст')
+        title.genre.set([genre])
+        review = Review.objects.create(title=title, author=admin,
+                                       text='Отзыв', score=8)
+        Comment.objects.create(review=review, author=admin,
+                               text='Комментарий')
+        return review
+
+    def get(self, client, url, fields):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, {'fields': fields})
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` с параметром `fields` '
+            'возвращает ответ со статусом 200.'
+        )
+        return response.json(), ' '.join(
+            query['sql'] for query in context.captured_queries
+        )
+
+    def test_01_title_fields(self, client, review):
+        data, sql = self.get(client, '/api/v1/titles/', 'id,name,rating')
+        assert data['results'] == [
+            {'id': review.title_id, 'name': 'Тест', 'rating': 8}
+        ], (
+            'Проверьте, что параметр `fields` ограничивает поля '
+            'произведений в ответе.'
+        )
+        assert 'description' not in sql and 'genre' not in sql, (
+            'Проверьте, что для незапрошенных полей не загружаются столбцы '
+            'и не выполняется prefetch жанров.'
+        )
+        data, sql = self.get(
+            client, f'/api/v1/titles/{review.title_id}/', 'genre'
+        )
+        assert data == {'genre': [{'name': 'Драма', 'slug': 'drama'}]}
+        assert 'reviews_category' not in sql
+
+    def test_02_review_and_comment_fields(self, client, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        data, sql = self.get(client, url, 'id,score')
+        assert data['results'] == [{'id': review.pk, 'score': 8}]
+        # Скрытые авторы исключаются подзапросом, столбцы пользователей
+        # не читаются.
+        assert '"reviews_user".' not in sql and '"text"' not in sql
+        data, sql = self.get(client, url, 'author')
+        assert data['results'] == [{'author': review.author.username}]
+
+        url = f'{url}{review.pk}/comments/'
+        data, sql = self.get(client, url, 'text')
+        assert data['results'] == [{'text': 'Комментарий'}]
+        assert '"reviews_user".' not in sql
+
+    def test_03_writes_ignore_fields(self, admin_client, review):
+        response = admin_client.patch(
+            f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/'
+            '?fields=id',
+            {'text': 'Новый текст'}
+        )
+        assert response.status_code == 200
+        assert response.json()['text'] == 'Новый текст'
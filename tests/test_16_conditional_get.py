@@ -0,0 +1,149 @@
+import os
+
+import pytest
+from django.conf import settings
+
+from reviews.models import Comment, Review, Title
+from reviews.moderation import hide_titles
+from tests.utils import run_in_other_process
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16ConditionalGet:
+
+    @pytest.fixture
+    def review(self, admin, title):
+        review = Review.objects.create(title=title, author=admin,
+                                       text='Отзыв', score=8)
+        Comment.objects.create(review=review, author=admin,
+                               text='Комментарий')
+        return review
+
+    def check_not_modified(self, client, url,
+                           django_assert_num_queries, queries=0):
+        response = client.get(url)
+        assert response.status_code == 200
+        etag = response['ETag']
+        assert etag and response['Last-Modified'], (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        with django_assert_num_queries(queries):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            f'Проверьте, что GET-запрос к `{url}` с совпадающим '
+            '`If-None-Match` возвращает ответ 304, проверив только '
+            'существование объекта или родителя.'
+        )
+        with django_assert_num_queries(queries):
+            response = client.get(
+                url,
+                HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+        assert response.status_code == 304
+        return etag
+
+    def test_01_not_modified(self, client, review,
+                             django_assert_num_queries):
+        title_id = review.title_id
+        self.check_not_modified(client, '/api/v1/titles/',
+                                django_assert_num_queries)
+        # Для объекта и вложенного списка 304 отдаётся после проверки,
+        # что объект или родитель существует и виден.
+        urls = (
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{review.pk}/',
+            f'/api/v1/titles/{title_id}/reviews/{review.pk}/comments/',
+        )
+        for url in urls:
+            self.check_not_modified(client, url, django_assert_num_queries,
+                                    queries=1)
+
+    def test_02_validators_change_on_write(self, client, review, user,
+                                           django_assert_num_queries):
+        title_id = review.title_id
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review.pk}/comments/'
+        titles_etag = self.check_not_modified(
+            client, '/api/v1/titles/', django_assert_num_queries
+        )
+        reviews_etag = client.get(reviews_url)['ETag']
+        comments_etag = client.get(comments_url)['ETag']
+
+        Comment.objects.create(review=review, author=user, text='Ещё')
+        assert client.get(
+            comments_url, HTTP_IF_NONE_MATCH=comments_etag
+        ).status_code == 200, (
+            'Проверьте, что `ETag` комментариев меняется при добавлении '
+            'комментария.'
+        )
+        assert client.get(
+            reviews_url, HTTP_IF_NONE_MATCH=reviews_etag
+        ).status_code == 200, (
+            'Проверьте, что `ETag` отзывов меняется при добавлении '
+            'комментария: в отзыве выводится число комментариев.'
+        )
+        reviews_etag = client.get(reviews_url)['ETag']
+
+        Review.objects.create(title=review.title, author=user, text='Ещё',
+                              score=2)
+        for url, etag in (
+            ('/api/v1/titles/', titles_etag), (reviews_url, reviews_etag)
+        ):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                f'Проверьте, что `ETag` для `{url}` меняется при добавлении '
+                'отзыва.'
+            )
+
+        reviews_etag = client.get(reviews_url)['ETag']
+        review.author.username = 'renamed'
+        review.author.save()
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=reviews_etag)
+        assert response.status_code == 200, (
+            'Проверьте, что `ETag` отзывов меняется при смене имени автора.'
+        )
+
+    def test_03_bounded_version_keys(self, client, review):
+        title_id = review.title_id
+        missing_id = title_id + 100
+        url = f'/api/v1/titles/{missing_id}/reviews/'
+        assert client.get(url).status_code == 404
+        assert 'ETag' not in client.get(url)
+        for url in (
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{review.pk}/',
+            f'/api/v1/titles/{title_id}/reviews/{review.pk}/comments/',
+        ):
+            assert client.get(url).status_code == 200
+        assert len(os.listdir(settings.CACHES['versions']['LOCATION'])) <= 2, (
+            'Проверьте, что версии отдельных произведений и отзывов '
+            'хранятся в БД, а в общем кеше версий — только версии каталога '
+            'и пользователей.'
+        )
+
+    def test_04_hidden_title(self, client, review):
+        comments_url = (f'/api/v1/titles/{review.title_id}/reviews/'
+                        f'{review.pk}/comments/')
+        etag = client.get(comments_url)['ETag']
+        hide_titles(Title.objects.filter(pk=review.title_id))
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 404, (
+            'Проверьте, что комментарии к отзыву скрытого произведения не '
+            'отдаются ответом 304.'
+        )
+
+    def test_05_other_process_change(self, client, review, user):
+        reviews_url = f'/api/v1/titles/{review.title_id}/reviews/'
+        etag = client.get(reviews_url)['ETag']
+        run_in_other_process(
+            Review.objects.create, title=review.title, author=user,
+            text='Ещё', score=2
+        )
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что `ETag` отзывов меняется при добавлении отзыва '
+            'в другом процессе: версии должны быть общими для процессов.'
+        )
@@ -0,0 +1,58 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17NestedParentLookup:
+
+    def test_01_missing_parent(self, client, title, admin):
+        assert client.get(
+            f'/api/v1/titles/{title.pk}/reviews/'
+        ).status_code == 200
+        assert client.get(
+            f'/api/v1/titles/{title.pk + 1}/reviews/'
+        ).status_code == 404, (
+            'Проверьте, что список отзывов несуществующего произведения '
+            'возвращает ответ со статусом 404.'
+        )
+        review = Review.objects.create(title=title, author=admin,
+                                       text='Отзыв', score=5)
+        assert client.get(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        ).status_code == 200
+        assert client.get(
+            f'/api/v1/titles/{title.pk + 1}/reviews/{review.pk}/comments/'
+        ).status_code == 404, (
+            'Проверьте, что список комментариев к отзыву другого '
+            'произведения возвращает ответ со статусом 404.'
+        )
+
+    def test_02_single_parent_lookup_on_create(self, user_client, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, {'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 201
+        title_lookups = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT "reviews_title"."id", '
+                                       '"reviews_title"."name"')
+        ]
+        assert len(title_lookups) == 1, (
+            f'Проверьте, что POST-запрос к `{url}` получает произведение '
+            'из БД один раз.'
+        )
+        review_id = response.json()['id']
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                f'{url}{review_id}/comments/', {'text': 'Комментарий'}
+            )
+        assert response.status_code == 201
+        review_lookups = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT "reviews_review"."id"')
+            and '"reviews_review"."text"' in query['sql']
+        ]
+        assert len(review_lookups) == 1
@@ -0,0 +1,88 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from reviews.models import Review
+
+THREADS_COUNT = 8
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18DuplicateReview:
+
+    def test_01_no_exists_query(self, user_client, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        for data, status in (
+            ({'text': 'Отзыв', 'score': 5}, HTTPStatus.CREATED),
+            ({'text': 'Ещё', 'score': 6}, HTTPStatus.BAD_REQUEST),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                response = user_client.post(url, data)
+            assert response.status_code == status
+            review_queries = [
+                query['sql'] for query in context.captured_queries
+                if '"reviews_review"' in query['sql']
+            ]
+            assert review_queries[0].startswith('INSERT'), (
+                'Проверьте, что перед созданием отзыва не выполняется '
+                'запрос на существование отзыва автора: повтор отсекает '
+                'ограничение `unique_title_author`.'
+            )
+        assert 'non_field_errors' in response.json(), (
+            'Проверьте, что повторный отзыв отклоняется с прежним текстом '
+            'ошибки в `non_field_errors`.'
+        )
+
+    def test_02_concurrent_duplicates(self, token_user, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        barrier = threading.Barrier(THREADS_COUNT)
+        statuses = []
+
+        def post_review(idx):
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {token_user["access"]}'
+            )
+            barrier.wait()
+            try:
+                response = client.post(
+                    url, {'text': f'Отзыв {idx}', 'score': 5}
+                )
+                statuses.append(response.status_code)
+            except Exception as error:
+                statuses.append(type(error).__name__)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=post_review, args=(idx,))
+            for idx in range(THREADS_COUNT)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(statuses) == (
+            [HTTPStatus.CREATED]
+            + [HTTPStatus.BAD_REQUEST] * (THREADS_COUNT - 1)
+        ), (
+            'Проверьте, что при одновременных POST-запросах одного '
+            'пользователя создаётся один отзыв, а остальные запросы '
+            'получают ответ со статусом 400.'
+        )
+        assert Review.objects.filter(title=title).count() == 1
+
+    def test_03_other_integrity_errors(self, user_client, title,
+                                       monkeypatch):
+        def save(review, *args, **kwargs):
+            raise IntegrityError('NOT NULL constraint failed')
+
+        monkeypatch.setattr(Review, 'save', save)
+        with pytest.raises(IntegrityError):
+            user_client.post(f'/api/v1/titles/{title.pk}/reviews/',
+                             {'text': 'Отзыв', 'score': 5})
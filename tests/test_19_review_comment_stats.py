@@ -0,0 +1,111 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ReviewCommentStats:
+
+    @pytest.fixture
+    def review(self, admin, title):
+        return Review.objects.create(title=title, author=admin,
+                                     text='Отзыв', score=5)
+
+    def get_url(self, review):
+        return f'/api/v1/titles/{review.title_id}/reviews/'
+
+    def test_01_counters_on_create_and_delete(self, admin_client, review):
+        url = self.get_url(review)
+        response = admin_client.get(f'{url}{review.pk}/')
+        assert response.json()['comment_count'] == 0
+        assert response.json()['last_comment_at'] is None, (
+            'Проверьте, что у отзыва без комментариев поле '
+            '`last_comment_at` равно null.'
+        )
+        comment_ids = [
+            admin_client.post(
+                f'{url}{review.pk}/comments/', {'text': f'Комментарий {idx}'}
+            ).json()['id'] for idx in range(3)
+        ]
+        data = admin_client.get(f'{url}{review.pk}/').json()
+        last = Comment.objects.get(pk=comment_ids[-1])
+        assert data['comment_count'] == 3, (
+            f'Проверьте, что GET-запрос к `{url}{{review_id}}/` возвращает '
+            'актуальное количество комментариев к отзыву.'
+        )
+        assert data['last_comment_at'] == admin_client.get(
+            f'{url}{review.pk}/comments/{last.pk}/'
+        ).json()['pub_date'], (
+            'Проверьте, что `last_comment_at` совпадает с датой последнего '
+            'комментария.'
+        )
+
+        admin_client.delete(f'{url}{review.pk}/comments/{last.pk}/')
+        review.refresh_from_db()
+        assert review.comment_count == 2
+        assert review.last_comment_at == Comment.objects.get(
+            pk=comment_ids[1]
+        ).pub_date, (
+            'Проверьте, что после удаления последнего комментария '
+            '`last_comment_at` пересчитывается по оставшимся.'
+        )
+
+    def test_02_cascade_delete(self, review, user):
+        Comment.objects.create(review=review, author=user, text='Первый')
+        Comment.objects.create(review=review, author=review.author,
+                               text='Второй')
+        user.delete()
+        review.refresh_from_db()
+        assert review.comment_count == 1, (
+            'Проверьте, что счётчик комментариев уменьшается при каскадном '
+            'удалении комментариев вместе с автором.'
+        )
+        assert review.last_comment_at == review.comments.get().pub_date
+
+    def test_03_ordering_without_joins(self, client, review, user):
+        other = Review.objects.create(title=review.title, author=user,
+                                      text='Другой', score=7)
+        Comment.objects.create(review=other, author=user, text='Комментарий')
+        url = self.get_url(review)
+        for ordering, expected in (
+            ('-comment_count', [other.pk, review.pk]),
+            ('comment_count', [review.pk, other.pk]),
+            ('-last_comment_at', [other.pk, review.pk]),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url, {'ordering': ordering})
+            assert [
+                item['id'] for item in response.json()['results']
+            ] == expected, (
+                f'Проверьте, что отзывы сортируются параметром '
+                f'`ordering={ordering}`.'
+            )
+            order_by = [
+                query['sql'].split('ORDER BY')[1]
+                for query in context.captured_queries
+                if 'ORDER BY' in query['sql']
+            ]
+            assert order_by and all(
+                '"reviews_review"."' in clause
+                and '"reviews_comment"' not in clause
+                for clause in order_by
+            ), (
+                'Проверьте, что сортировка отзывов использует сохранённые '
+                'поля отзыва, без соединения с комментариями.'
+            )
+        assert all(
+            '"reviews_comment"' not in query['sql']
+            for query in context.captured_queries
+        )
+
+    def test_04_comment_refreshes_review_list(self, admin_client, review):
+        url = self.get_url(review)
+        etag = admin_client.get(url)['ETag']
+        admin_client.post(f'{url}{review.pk}/comments/', {'text': 'Новый'})
+        response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый комментарий меняет ETag списка отзывов.'
+        )
+        assert response.json()['results'][0]['comment_count'] == 1
@@ -0,0 +1,134 @@
+from datetime import datetime, timezone
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, Title
+
+
+@pytest.mark.django_db
+class Test20NestedCursorPagination:
+
+    @pytest.fixture
+    def review(self, category, make_authors):
+        titles = [
+            Title.objects.create(name=f'Тест {idx}', year=2000,
+                                 category=category) for idx in range(2)
+        ]
+        authors = make_authors(7)
+        for title in titles:
+            for author in authors:
+                review = Review.objects.create(
+                    title=title, author=author, text='Отзыв', score=5
+                )
+                Comment.objects.create(review=review, author=author,
+                                       text='Комментарий')
+        # Одинаковые даты: порядок внутри них задаёт id.
+        Review.objects.filter(pk__in=list(
+            Review.objects.values_list('pk', flat=True)[:4]
+        )).update(pub_date=datetime(2020, 1, 1, tzinfo=timezone.utc))
+        for author in authors[:3]:
+            Comment.objects.create(review=review, author=author,
+                                   text='Ещё комментарий')
+        return review
+
+    def walk(self, client, url):
+        ids, previous_url = [], None
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает ответ '
+                'со статусом 200.'
+            )
+            data = response.json()
+            assert 'count' not in data
+            ids.extend(item['id'] for item in data['results'])
+            previous_url, url = url, data['next']
+        return ids, previous_url
+
+    @pytest.mark.parametrize('nested', ('reviews', 'comments'))
+    def test_01_cursor_walk(self, client, review, nested):
+        if nested == 'reviews':
+            url = f'/api/v1/titles/{review.title_id}/reviews/'
+            expected = list(Review.objects.filter(
+                title_id=review.title_id
+            ).order_by('-pub_date', '-id').values_list('pk', flat=True))
+        else:
+            url = (f'/api/v1/titles/{review.title_id}/reviews/'
+                   f'{review.pk}/comments/')
+            expected = list(review.comments.order_by(
+                '-pub_date', '-id'
+            ).values_list('pk', flat=True))
+        ids, last_url = self.walk(client, f'{url}?cursor=&limit=2')
+        assert ids == expected, (
+            f'Проверьте, что курсорная пагинация `{url}` проходит все '
+            'записи родителя по убыванию даты публикации и id без '
+            'пропусков и повторов.'
+        )
+        previous = client.get(last_url).json()['previous']
+        if previous:
+            data = client.get(previous).json()
+            start = (len(expected) - 1) // 2 * 2
+            assert [
+                item['id'] for item in data['results']
+            ] == expected[start - 2:start], (
+                'Проверьте, что ссылка `previous` ведёт на предыдущую '
+                'страницу.'
+            )
+
+    def test_02_fields_and_cursor(self, client, review,
+                                  django_assert_num_queries):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        # Произведение читается вместе с версией отзывов для ETag.
+        with django_assert_num_queries(2):
+            response = client.get(url, {
+                'cursor': '', 'limit': 2, 'fields': 'id,score'
+            })
+        assert response.json()['next'], (
+            'Проверьте, что курсорная пагинация работает вместе '
+            'с параметром `fields`.'
+        )
+
+    @pytest.mark.parametrize('nested, table, index', (
+        ('reviews', 'reviews_review', 'review_title_pub_date_idx'),
+        ('comments', 'reviews_comment', 'comment_review_pub_date_idx'),
+    ))
+    def test_03_query_plan_uses_index(self, client, review, nested, table,
+                                      index):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        if nested == 'comments':
+            url = f'{url}{review.pk}/comments/'
+        first = client.get(url, {'cursor': '', 'limit': 2}).json()
+        with CaptureQueriesContext(connection) as context:
+            client.get(first['next'])
+        for query in context.captured_queries:
+            # Родитель читается по первичному ключу, авторов новой страницы
+            # догружает кеш пользователей.
+            if f'FROM "{table}"' not in query['sql']:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+                plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+            assert index in plan, (
+                f'Проверьте, что страница `{url}` выбирается по индексу '
+                f'`{index}`: {plan}'
+            )
+            assert 'TEMP B-TREE' not in plan, (
+                f'Проверьте, что страница `{url}` не сортируется отдельно '
+                f'от индекса: {plan}'
+            )
+
+    def test_04_ordering_with_cursor(self, client, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        response = client.get(url, {
+            'cursor': '', 'ordering': 'comment_count'
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что параметр `ordering` вместе с `cursor` '
+            'возвращает ответ со статусом 400, а не игнорируется.'
+        )
+        assert 'ordering' in response.json()
+        assert client.get(
+            url, {'ordering': 'comment_count'}
+        ).status_code == 200
@@ -0,0 +1,128 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, ScoreHistogram, Title, User
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21BulkModeration:
+    REVIEWS_URL = '/api/v1/moderation/reviews/'
+    COMMENTS_URL = '/api/v1/moderation/comments/'
+
+    @pytest.fixture
+    def spammer(self):
+        return User.objects.create(username='spammer',
+                                   email='spammer@yamdb.fake')
+
+    @pytest.fixture
+    def titles(self, spammer, user, category):
+        titles = [
+            Title.objects.create(name=f'Тест {idx}', year=2000,
+                                 category=category) for idx in range(3)
+        ]
+        for title in titles:
+            review = Review.objects.create(title=title, author=user,
+                                           text='Отзыв', score=8)
+            spam = Review.objects.create(title=title, author=spammer,
+                                         text='Спам', score=1)
+            for target in (review, spam):
+                Comment.objects.create(review=target, author=spammer,
+                                       text='Спам')
+                Comment.objects.create(review=target, author=user,
+                                       text='Ответ')
+        return titles
+
+    def test_01_permissions(self, client, user_client, moderator_client,
+                            titles, spammer):
+        data = {'author': spammer.username}
+        assert client.post(self.REVIEWS_URL, data).status_code == 401
+        assert user_client.post(
+            self.REVIEWS_URL, data
+        ).status_code == 403, (
+            f'Проверьте, что POST-запрос пользователя к `{self.REVIEWS_URL}` '
+            'возвращает ответ со статусом 403.'
+        )
+        assert moderator_client.post(
+            self.REVIEWS_URL, {}, format='json'
+        ).status_code == 400, (
+            f'Проверьте, что POST-запрос к `{self.REVIEWS_URL}` без `ids` '
+            'и `author` возвращает ответ со статусом 400.'
+        )
+        assert moderator_client.post(
+            self.REVIEWS_URL, {'author': 'nobody'}
+        ).status_code == 400
+        assert Review.objects.count() == 6
+
+    def test_02_delete_reviews_by_author(self, moderator_client, titles,
+                                         spammer, user):
+        with CaptureQueriesContext(connection) as context:
+            response = moderator_client.post(
+                self.REVIEWS_URL, {'author': spammer.username}
+            )
+        assert response.status_code == 200, (
+            f'Проверьте, что POST-запрос модератора к `{self.REVIEWS_URL}` '
+            'возвращает ответ со статусом 200.'
+        )
+        assert response.json() == {'reviews': 3, 'comments': 6}
+        assert not Review.objects.filter(author=spammer).exists()
+        rating_updates = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "reviews_title"')
+        ]
+        assert len(rating_updates) == 1, (
+            'Проверьте, что рейтинги пересчитываются одним запросом на все '
+            'затронутые произведения, а не на каждый отзыв.'
+        )
+        for title in Title.objects.all():
+            assert (title.rating, title.rating_count) == (8, 1), (
+                'Проверьте, что после массового удаления рейтинг '
+                'произведения пересчитан по оставшимся отзывам.'
+            )
+            assert ScoreHistogram.objects.get(title=title).get_counts()[1] == 0
+        detail = moderator_client.get(
+            f'/api/v1/titles/{titles[0].pk}/reviews/'
+        ).json()
+        assert [item['author'] for item in detail['results']] == [
+            user.username
+        ]
+
+    def test_03_delete_comments_by_ids(self, moderator_client, titles,
+                                       spammer):
+        review = Review.objects.exclude(author=spammer).first()
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/'
+        assert moderator_client.get(url).json()['comment_count'] == 2
+        spam_ids = list(Comment.objects.filter(
+            author=spammer
+        ).values_list('pk', flat=True))
+        response = moderator_client.post(
+            self.COMMENTS_URL, {'ids': spam_ids}, format='json'
+        )
+        assert response.status_code == 200
+        assert response.json() == {'reviews': 0, 'comments': len(spam_ids)}
+        assert not Comment.objects.filter(author=spammer).exists()
+        assert moderator_client.get(url).json()['comment_count'] == 1, (
+            'Проверьте, что после массового удаления комментариев счётчики '
+            'отзывов пересчитаны, а кеш списка отзывов сброшен.'
+        )
+
+    def test_04_constant_query_count(self, moderator_client, titles,
+                                     spammer, user):
+        reviews = list(Review.objects.filter(author=spammer))
+        # Первый запрос кладёт пользователя токена в кеш аутентификации.
+        moderator_client.get('/api/v1/users/me/')
+        with CaptureQueriesContext(connection) as context:
+            moderator_client.post(
+                self.REVIEWS_URL, {'ids': [reviews[0].pk]}, format='json'
+            )
+        single = len(context.captured_queries)
+        with CaptureQueriesContext(connection) as context:
+            moderator_client.post(
+                self.REVIEWS_URL,
+                {'ids': [review.pk for review in reviews[1:]]},
+                format='json'
+            )
+        assert len(context.captured_queries) == single, (
+            'Проверьте, что число запросов массовой модерации не зависит '
+            'от количества удаляемых отзывов.'
+        )
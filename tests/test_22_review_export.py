@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.export import iter_reviews_ndjson
+from reviews.models import Comment, Review
+
+
+@pytest.mark.django_db
+class Test22ReviewExport:
+
+    @pytest.fixture
+    def title(self, title, make_authors):
+        for idx, author in enumerate(make_authors(5)):
+            review = Review.objects.create(title=title, author=author,
+                                           text=f'Отзыв {idx}', score=idx + 1)
+            for number in range(idx):
+                Comment.objects.create(review=review, author=author,
+                                       text=f'Комментарий {number}')
+        return title
+
+    def get_url(self, title):
+        return f'/api/v1/titles/{title.pk}/reviews/export/'
+
+    def read_lines(self, response):
+        assert response.streaming, (
+            'Проверьте, что экспорт отзывов отдаётся потоковым ответом.'
+        )
+        return [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+
+    def test_01_export_reviews(self, client, title):
+        url = self.get_url(title)
+        response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ '
+            'со статусом 200.'
+        )
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = self.read_lines(response)
+        listed = client.get(
+            f'/api/v1/titles/{title.pk}/reviews/', {'limit': 10}
+        ).json()['results']
+        assert lines == listed, (
+            f'Проверьте, что `{url}` выводит по строке на отзыв в том же '
+            'представлении, что и список отзывов.'
+        )
+        assert client.get(
+            f'/api/v1/titles/{title.pk + 1}/reviews/export/'
+        ).status_code == 404
+
+    def test_02_export_with_comments(self, client, title):
+        lines = self.read_lines(
+            client.get(self.get_url(title), {'comments': 'true'})
+        )
+        for line in lines:
+            review = Review.objects.get(pk=line['id'])
+            assert [comment['id'] for comment in line['comments']] == list(
+                review.comments.order_by(
+                    '-pub_date', '-id'
+                ).values_list('pk', flat=True)
+            ), (
+                'Проверьте, что с параметром `comments=true` в каждой строке '
+                'отзыва выводятся его комментарии.'
+            )
+
+    def test_03_chunked_queries(self, title):
+        reviews = title.reviews.order_by('-pub_date', '-id')
+        with CaptureQueriesContext(connection) as context:
+            lines = list(iter_reviews_ndjson(reviews, True, chunk_size=2))
+        assert len(lines) == 5
+        comment_queries = [
+            query for query in context.captured_queries
+            if 'FROM "reviews_comment"' in query['sql']
+        ]
+        assert len(comment_queries) == 3, (
+            'Проверьте, что комментарии выбираются одним запросом на блок '
+            'отзывов.'
+        )
+        # Авторов догружает кеш пользователей, без JOIN в выборках.
+        assert len([
+            query for query in context.captured_queries
+            if '"reviews_user".' not in query['sql']
+        ]) == 4
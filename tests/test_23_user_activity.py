@@ -0,0 +1,101 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, Title, User
+
+
+@pytest.mark.django_db
+class Test23UserActivity:
+
+    @pytest.fixture
+    def reviews(self, user, category):
+        other = User.objects.create(username='other',
+                                    email='other@yamdb.fake')
+        reviews = []
+        for idx in range(5):
+            title = Title.objects.create(name=f'Тест {idx}', year=2000,
+                                         category=category)
+            review = Review.objects.create(title=title, author=user,
+                                           text='Отзыв', score=5)
+            Review.objects.create(title=title, author=other,
+                                  text='Чужой отзыв', score=3)
+            Comment.objects.create(review=review, author=user,
+                                   text='Комментарий')
+            Comment.objects.create(review=review, author=other,
+                                   text='Чужой комментарий')
+            reviews.append(review)
+        return reviews
+
+    def walk(self, client, url):
+        items = []
+        while url:
+            data = client.get(url).json()
+            items.extend(data['results'])
+            url = data['next']
+        return items
+
+    @pytest.mark.parametrize('nested', ('reviews', 'comments'))
+    def test_01_user_activity(self, client, user, reviews, nested):
+        url = f'/api/v1/users/{user.username}/{nested}/'
+        response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ '
+            'со статусом 200.'
+        )
+        items = self.walk(client, f'{url}?limit=2')
+        model = Review if nested == 'reviews' else Comment
+        assert [item['id'] for item in items] == list(
+            model.objects.filter(author=user).order_by(
+                '-pub_date', '-id'
+            ).values_list('pk', flat=True)
+        ), (
+            f'Проверьте, что `{url}` постранично возвращает все записи '
+            'автора, новые первыми.'
+        )
+        for item in items:
+            assert item['author'] == user.username
+            assert item['title']['name'].startswith('Тест'), (
+                f'Проверьте, что записи `{url}` содержат название '
+                'произведения.'
+            )
+        assert client.get(
+            f'/api/v1/users/nobody/{nested}/'
+        ).status_code == 404
+
+    @pytest.mark.parametrize('nested', ('reviews', 'comments'))
+    def test_02_me(self, client, user_client, user, reviews, nested):
+        url = f'/api/v1/users/me/{nested}/'
+        assert client.get(url).status_code == 401, (
+            f'Проверьте, что GET-запрос к `{url}` без токена возвращает '
+            'ответ со статусом 401.'
+        )
+        response = user_client.get(url)
+        assert response.status_code == 200
+        assert {
+            item['author'] for item in response.json()['results']
+        } == {user.username}
+
+    @pytest.mark.parametrize('nested, index', (
+        ('reviews', 'review_author_pub_date_idx'),
+        ('comments', 'comment_author_pub_date_idx'),
+    ))
+    def test_03_single_query_with_index(self, client, user, reviews, nested,
+                                        index, django_assert_num_queries):
+        url = f'/api/v1/users/{user.username}/{nested}/'
+        first = client.get(url, {'limit': 2}).json()
+        with django_assert_num_queries(2):
+            client.get(first['next'])
+        with CaptureQueriesContext(connection) as context:
+            client.get(first['next'])
+        page_query = context.captured_queries[-1]['sql']
+        assert '"reviews_title"' in page_query, (
+            f'Проверьте, что `{url}` получает произведения тем же запросом.'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {page_query}')
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        assert index in plan and 'TEMP B-TREE' not in plan, (
+            f'Проверьте, что страница `{url}` выбирается по индексу '
+            f'`{index}`: {plan}'
+        )
@@ -0,0 +1,177 @@
+import pytest
+from django.contrib import admin
+from django.core.management import CommandError, call_command
+
+from reviews import moderation
+from reviews.models import CategoryRanking, Comment, Review, Title, User
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24SoftDelete:
+
+    @pytest.fixture
+    def title(self, title, user, moderator, make_authors):
+        for author in make_authors(3):
+            review = Review.objects.create(title=title, author=author,
+                                           text='Отзыв', score=2)
+            Comment.objects.create(review=review, author=user,
+                                   text='Комментарий')
+            Comment.objects.create(review=review, author=moderator,
+                                   text='Ответ')
+        Review.objects.create(title=title, author=user, text='Отзыв',
+                              score=10)
+        return title
+
+    def purge(self):
+        call_command('purge_deleted', batch_size=2)
+
+    def test_01_review(self, user_client, user, title):
+        review = Review.objects.get(author=user)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = user_client.delete(f'{url}{review.pk}/')
+        assert response.status_code == 204
+        assert Review.all_objects.filter(pk=review.pk).exists(), (
+            'Проверьте, что DELETE-запрос к отзыву только скрывает его, '
+            'а удаление остаётся фоновой очистке.'
+        )
+        assert review.pk not in [
+            item['id'] for item in user_client.get(url).json()['results']
+        ]
+        assert user_client.get(f'{url}{review.pk}/').status_code == 404
+        title.refresh_from_db()
+        assert (title.rating, title.rating_count) == (2, 3), (
+            'Проверьте, что оценка скрытого отзыва сразу исключается из '
+            'рейтинга произведения.'
+        )
+        assert user_client.post(
+            url, {'text': 'Новый отзыв', 'score': 6}
+        ).status_code == 201, (
+            'Проверьте, что после удаления отзыва можно оставить новый.'
+        )
+
+        self.purge()
+        assert not Review.all_objects.filter(pk=review.pk).exists()
+        title.refresh_from_db()
+        assert (title.rating, title.rating_count) == (3, 4)
+
+    def test_02_title(self, admin_client, title):
+        review = Review.objects.filter(title=title).first()
+        response = admin_client.delete(f'/api/v1/titles/{title.pk}/')
+        assert response.status_code == 204
+        assert admin_client.get('/api/v1/titles/').json()['count'] == 0, (
+            'Проверьте, что удалённое произведение сразу пропадает из '
+            'списка.'
+        )
+        for url in (
+            f'/api/v1/titles/{title.pk}/',
+            f'/api/v1/titles/{title.pk}/reviews/',
+            f'/api/v1/titles/{title.pk}/histogram/',
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/',
+        ):
+            assert admin_client.get(url).status_code == 404, (
+                f'Проверьте, что после удаления произведения `{url}` '
+                'возвращает ответ со статусом 404.'
+            )
+        assert not CategoryRanking.objects.exists()
+
+        self.purge()
+        assert not Title.all_objects.exists()
+        assert not Review.all_objects.exists()
+        assert not Comment.all_objects.exists(), (
+            'Проверьте, что фоновая очистка удаляет отзывы и комментарии '
+            'удалённого произведения.'
+        )
+
+    def test_03_user(self, admin_client, user_client, user, title):
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что токен удалённого пользователя сразу перестаёт '
+            'действовать.'
+        )
+        assert admin_client.get(
+            f'/api/v1/users/{user.username}/'
+        ).status_code == 404
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        assert user.username not in [
+            item['author']
+            for item in admin_client.get(reviews_url).json()['results']
+        ], (
+            'Проверьте, что отзывы удалённого пользователя скрываются '
+            'сразу, не дожидаясь фоновой очистки.'
+        )
+        title.refresh_from_db()
+        assert (title.rating, title.rating_count) == (4, 4), (
+            'Проверьте, что удаление пользователя скрывает только его '
+            'строку, а рейтинг пересчитывает фоновая очистка.'
+        )
+        review = Review.objects.filter(title=title).first()
+        comments_url = (f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+                        'comments/')
+        assert user.username not in [
+            item['author']
+            for item in admin_client.get(comments_url).json()['results']
+        ], (
+            'Проверьте, что комментарии удалённого пользователя скрываются '
+            'сразу, не дожидаясь фоновой очистки.'
+        )
+        assert set(Review.objects.values_list(
+            'comment_count', flat=True
+        )) == {2}
+
+        self.purge()
+        assert not User.all_objects.filter(pk=user.pk).exists()
+        assert not Comment.all_objects.filter(author_id=user.pk).exists()
+        assert set(Review.objects.values_list(
+            'comment_count', flat=True
+        )) == {1}, (
+            'Проверьте, что после очистки комментариев удалённого '
+            'пользователя счётчики комментариев отзывов пересчитаны.'
+        )
+        title.refresh_from_db()
+        assert (title.rating, title.rating_count) == (2, 3)
+
+    def test_04_batches(self, admin_client, title, monkeypatch):
+        admin_client.delete(f'/api/v1/titles/{title.pk}/')
+        batches = []
+        original = moderation.delete_hidden
+
+        def delete_hidden(queryset):
+            deleted = original(queryset)
+            batches.append(sum(deleted.values()))
+            return deleted
+
+        monkeypatch.setattr(moderation, 'delete_hidden', delete_hidden)
+        self.purge()
+        assert batches and max(batches) <= 2, (
+            'Проверьте, что фоновая очистка удаляет строки порциями не '
+            'больше `--batch-size`.'
+        )
+        assert sum(batches) > 2
+
+    def test_05_admin_delete(self, user, title):
+        review = Review.objects.get(author__username='author0')
+        admin.site._registry[User].delete_model(None, user)
+        admin.site._registry[Review].delete_queryset(
+            None, Review.objects.filter(pk=review.pk)
+        )
+        assert User.all_objects.get(pk=user.pk).is_deleted, (
+            'Проверьте, что удаление пользователя в админке только скрывает '
+            'его, как и удаление через API.'
+        )
+        assert Review.all_objects.get(pk=review.pk).is_deleted
+        assert Comment.all_objects.filter(author=user).exists()
+        assert not Comment.objects.filter(author=user).exists()
+        title.refresh_from_db()
+        assert title.rating_count == 3
+
+        self.purge()
+        assert not User.all_objects.filter(pk=user.pk).exists()
+        assert not Review.all_objects.filter(pk=review.pk).exists()
+        title.refresh_from_db()
+        assert (title.rating, title.rating_count) == (2, 2)
+
+    @pytest.mark.parametrize('batch_size', (0, -1))
+    def test_06_invalid_batch_size(self, batch_size):
+        with pytest.raises(CommandError):
+            call_command('purge_deleted', batch_size=batch_size)
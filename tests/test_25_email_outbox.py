@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from reviews.constants import OUTBOX_MAX_ATTEMPTS
+from reviews.models import OutgoingEmail
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class BrokenBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise ConnectionError('Почтовый сервер недоступен')
+
+
+@pytest.mark.django_db
+class Test25EmailOutbox:
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def signup(self, client, idx=0):
+        return client.post(self.URL_SIGNUP, data={
+            'email': f'user{idx}@yamdb.fake',
+            'username': f'user{idx}'
+        })
+
+    def test_01_signup_queues_email(self, client):
+        response = self.signup(client)
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что при регистрации письмо не отправляется во время '
+            'запроса, а ставится в очередь.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.to == 'user0@yamdb.fake'
+
+        call_command('send_emails')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что команда `send_emails` отправляет письма из '
+            'очереди.'
+        )
+        assert mail.outbox[0].to == ['user0@yamdb.fake']
+        email.refresh_from_db()
+        assert email.sent_at is not None and email.next_attempt_at is None
+        call_command('send_emails')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно.'
+        )
+
+    def test_02_invalid_signup_queues_nothing(self, client):
+        self.signup(client)
+        response = client.post(self.URL_SIGNUP, data={
+            'email': 'other@yamdb.fake', 'username': 'user0'
+        })
+        assert response.status_code == 400
+        assert OutgoingEmail.objects.count() == 1, (
+            'Проверьте, что письмо ставится в очередь в одной транзакции '
+            'с регистрацией.'
+        )
+
+    def test_03_single_connection(self, client, settings):
+        settings.EMAIL_BACKEND = f'{__name__}.CountingBackend'
+        CountingBackend.opened = 0
+        for idx in range(5):
+            self.signup(client, idx)
+        call_command('send_emails', batch_size=2)
+        assert len(mail.outbox) == 5
+        assert CountingBackend.opened == 1, (
+            'Проверьте, что очередь отправляется порциями через одно '
+            'соединение с почтовым сервером.'
+        )
+
+    def test_04_retries_with_backoff(self, client, settings):
+        settings.EMAIL_BACKEND = f'{__name__}.BrokenBackend'
+        assert self.signup(client).status_code == 200, (
+            'Проверьте, что недоступность почтового сервера не мешает '
+            'регистрации.'
+        )
+        delays = []
+        for _ in range(OUTBOX_MAX_ATTEMPTS):
+            call_command('send_emails')
+            email = OutgoingEmail.objects.get()
+            assert email.sent_at is None
+            assert 'ConnectionError' in email.last_error
+            if email.next_attempt_at is not None:
+                delays.append(email.next_attempt_at - timezone.now())
+                OutgoingEmail.objects.update(
+                    next_attempt_at=timezone.now() - timedelta(seconds=1)
+                )
+        assert email.attempts == OUTBOX_MAX_ATTEMPTS
+        assert email.next_attempt_at is None, (
+            'Проверьте, что после исчерпания попыток письмо больше не '
+            'отправляется.'
+        )
+        assert all(
+            later > earlier * 1.5 for earlier, later in zip(delays, delays[1:])
+        ), 'Проверьте, что задержка между попытками растёт.'
+
+        settings.EMAIL_BACKEND = f'{__name__}.CountingBackend'
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_emails')
+        assert len(mail.outbox) == 1
+
+    def test_05_filebased_backend(self, client, settings, tmp_path):
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.filebased.EmailBackend'
+        )
+        settings.EMAIL_FILE_PATH = tmp_path
+        self.signup(client)
+        assert not list(tmp_path.iterdir())
+        call_command('send_emails')
+        files = list(tmp_path.iterdir())
+        assert len(files) == 1
+        assert 'user0@yamdb.fake' in files[0].read_text()
+
+    @pytest.mark.parametrize('batch_size', (0, -1))
+    def test_06_invalid_batch_size(self, batch_size):
+        with pytest.raises(CommandError):
+            call_command('send_emails', batch_size=batch_size)
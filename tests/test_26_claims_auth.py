@@ -0,0 +1,145 @@
+from time import time
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import RoleAccessToken, user_claims_cache
+from reviews import moderation
+from reviews.constants import AUTH_USER_CACHE_TIMEOUT
+from reviews.models import User
+from tests.utils import run_in_other_process
+
+
+def get_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "reviews_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26ClaimsAuth:
+    URL_USERS = '/api/v1/users/'
+
+    @pytest.fixture(autouse=True)
+    def clear_claims_cache(self):
+        user_claims_cache.clear()
+        yield
+        user_claims_cache.clear()
+
+    @pytest.fixture
+    def staff(self):
+        return User.objects.create(username='staff', email='staff@yamdb.fake',
+                                   role=User.ADMIN)
+
+    def test_01_token_endpoint(self, client, user):
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user)
+        })
+        assert response.status_code == 201
+        token = AccessToken(response.json()['token'])
+        assert token['role'] == user.role, (
+            'Проверьте, что токен содержит роль пользователя.'
+        )
+        assert get_client(token).get(f'{self.URL_USERS}me/').status_code == 200
+
+    def test_02_no_user_query(self, staff):
+        client = get_client(RoleAccessToken.for_user(staff))
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.URL_USERS, {'search': 'nobody'})
+        assert response.status_code == 200
+        assert len(user_queries(context)) == 1, (
+            'Проверьте, что роль администратора берётся из токена и '
+            'пользователь не читается из БД для аутентификации.'
+        )
+
+    def test_03_role_change_applies(self, staff):
+        client = get_client(RoleAccessToken.for_user(staff))
+        assert client.get(self.URL_USERS).status_code == 200
+        staff.role = User.USER
+        staff.save()
+        assert client.get(self.URL_USERS).status_code == 403, (
+            'Проверьте, что после смены роли токен с прежней ролью не даёт '
+            'прав администратора.'
+        )
+        staff.role = User.ADMIN
+        staff.save(update_fields=('role',))
+        assert client.get(self.URL_USERS).status_code == 200
+
+    def test_04_unrelated_change_keeps_claims(self, staff):
+        client = get_client(RoleAccessToken.for_user(staff))
+        staff.bio = 'Обо мне'
+        staff.save(update_fields=('bio',))
+        with CaptureQueriesContext(connection) as context:
+            client.get(self.URL_USERS, {'search': 'nobody'})
+        assert len(user_queries(context)) == 1, (
+            'Проверьте, что изменение профиля без смены роли не отзывает '
+            'утверждения токена.'
+        )
+
+    def test_05_deleted_user(self, admin_client, staff):
+        client = get_client(RoleAccessToken.for_user(staff))
+        admin_client.delete(f'{self.URL_USERS}{staff.username}/')
+        assert client.get(f'{self.URL_USERS}me/').status_code == 401, (
+            'Проверьте, что токен удалённого пользователя перестаёт '
+            'действовать.'
+        )
+
+    def test_06_plain_token_cached(self, staff):
+        client = get_client(AccessToken.for_user(staff))
+        assert client.get(self.URL_USERS).status_code == 200
+        with CaptureQueriesContext(connection) as context:
+            client.get(self.URL_USERS, {'search': 'nobody'})
+        assert len(user_queries(context)) == 1, (
+            'Проверьте, что для токена без ролей пользователь кешируется '
+            'после первой загрузки.'
+        )
+        staff.role = User.USER
+        staff.save()
+        assert client.get(self.URL_USERS).status_code == 403, (
+            'Проверьте, что смена роли сбрасывает закешированного '
+            'пользователя.'
+        )
+
+    def test_07_other_process_change(self, staff):
+        client = get_client(RoleAccessToken.for_user(staff))
+        assert client.get(self.URL_USERS).status_code == 200
+
+        def demote():
+            staff.role = User.USER
+            staff.save()
+
+        run_in_other_process(demote)
+        assert client.get(self.URL_USERS).status_code == 403, (
+            'Проверьте, что смена роли в другом процессе отзывает роль из '
+            'выданного токена.'
+        )
+        run_in_other_process(
+            moderation.hide_users, User.objects.filter(pk=staff.pk)
+        )
+        assert client.get(f'{self.URL_USERS}me/').status_code == 401, (
+            'Проверьте, что удаление пользователя в другом процессе '
+            'отзывает выданный токен.'
+        )
+
+    def test_08_stale_claims_rechecked(self, staff):
+        token = RoleAccessToken.for_user(staff)
+        token['iat'] = int(time()) - AUTH_USER_CACHE_TIMEOUT - 1
+        client = get_client(token)
+        # Изменение в обход сигналов не меняет версию прав.
+        User.objects.filter(pk=staff.pk).update(role=User.USER)
+        assert client.get(self.URL_USERS).status_code == 403, (
+            'Проверьте, что утверждениям токена доверяют не дольше '
+            '`AUTH_USER_CACHE_TIMEOUT`, а затем пользователь читается из БД.'
+        )
@@ -0,0 +1,106 @@
+import pytest
+from rest_framework.test import APIClient
+
+from api.throttling import SlidingWindowRateThrottle
+from reviews.models import User
+
+
+@pytest.mark.django_db
+class Test27AuthThrottling:
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    @pytest.fixture(autouse=True)
+    def rates(self, settings):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {
+                'auth_ip': '4/min', 'auth_identity': '2/min'
+            }
+        }
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        now = [1000 * 60.0]
+        monkeypatch.setattr(
+            SlidingWindowRateThrottle, 'timer', lambda self: now[0]
+        )
+        return now
+
+    def signup(self, idx, ip='10.0.0.1', email=None, **extra):
+        return APIClient(REMOTE_ADDR=ip, **extra).post(self.URL_SIGNUP, data={
+            'username': f'user{idx}',
+            'email': email or f'user{idx}@yamdb.fake'
+        })
+
+    def test_01_ip_limit(self, clock):
+        for idx in range(4):
+            assert self.signup(idx).status_code == 200
+        response = self.signup(4)
+        assert response.status_code == 429, (
+            'Проверьте, что число регистраций с одного IP ограничено.'
+        )
+        assert int(response['Retry-After']) > 0
+        assert not User.objects.filter(username='user4').exists()
+        assert self.signup(4, ip='10.0.0.2').status_code == 200, (
+            'Проверьте, что ограничение по IP не затрагивает другие адреса.'
+        )
+
+    def test_02_identity_limit(self, clock):
+        email = 'victim@yamdb.fake'
+        for idx in range(2):
+            self.signup(idx, ip=f'10.0.1.{idx}', email=email)
+        assert self.signup(
+            5, ip='10.0.1.5', email=email.upper()
+        ).status_code == 429, (
+            'Проверьте, что попытки для одного адреса почты ограничены '
+            'независимо от IP.'
+        )
+        response = APIClient(REMOTE_ADDR='10.0.2.1').post(
+            self.URL_TOKEN,
+            data={'username': 'user0', 'confirmation_code': 'wrong'}
+        )
+        assert response.status_code != 429
+        for idx in range(2, 4):
+            response = APIClient(REMOTE_ADDR=f'10.0.2.{idx}').post(
+                self.URL_TOKEN,
+                data={'username': 'user0', 'confirmation_code': 'wrong'}
+            )
+        assert response.status_code == 429, (
+            'Проверьте, что подбор кода подтверждения для одного '
+            'пользователя ограничен.'
+        )
+
+    def test_03_blocked_without_queries(self, clock,
+                                        django_assert_num_queries):
+        for idx in range(4):
+            self.signup(idx)
+        with django_assert_num_queries(0):
+            response = self.signup(10)
+        assert response.status_code == 429, (
+            'Проверьте, что заблокированный запрос отклоняется до '
+            'обращения к БД.'
+        )
+
+    def test_04_sliding_window(self, clock):
+        for idx in range(4):
+            self.signup(idx)
+        clock[0] += 60
+        assert self.signup(4).status_code == 429, (
+            'Проверьте, что в начале следующей минуты учитываются запросы '
+            'предыдущей: окно скользящее.'
+        )
+        clock[0] += 45
+        assert self.signup(5).status_code == 200, (
+            'Проверьте, что по мере сдвига окна запросы снова разрешаются.'
+        )
+
+    def test_05_spoofed_forwarded_for(self, clock):
+        for idx in range(4):
+            self.signup(idx, HTTP_X_FORWARDED_FOR=f'192.168.0.{idx}')
+        assert self.signup(
+            4, HTTP_X_FORWARDED_FOR='192.168.0.100'
+        ).status_code == 429, (
+            'Проверьте, что подделанный заголовок X-Forwarded-For не '
+            'сбрасывает ограничение по IP.'
+        )
@@ -0,0 +1,65 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import User
+
+
+@pytest.mark.django_db
+class Test28UserSearch:
+    URL = '/api/v1/users/'
+
+    @pytest.fixture
+    def users(self):
+        return User.objects.bulk_create(
+            User(username=username, email=f'{username.lower()}@yamdb.fake')
+            for username in ('Alice', 'alina', 'Bob', 'malice', 'al.x')
+        )
+
+    def search(self, client, query, **params):
+        response = client.get(self.URL, {'search': query, **params})
+        assert response.status_code == 200
+        return [item['username'] for item in response.json()['results']]
+
+    def test_01_contains(self, admin_client, users):
+        assert self.search(admin_client, 'LIC') == ['Alice', 'malice'], (
+            'Проверьте, что `search` по умолчанию ищет по подстроке имени '
+            'без учёта регистра.'
+        )
+        assert self.search(admin_client, 'b') == ['Bob']
+        assert self.search(admin_client, '%') == []
+
+    def test_02_prefix(self, admin_client, users):
+        assert self.search(
+            admin_client, 'AL', search_mode='prefix'
+        ) == ['al.x', 'Alice', 'alina'], (
+            'Проверьте, что `search_mode=prefix` ищет пользователей по '
+            'началу имени.'
+        )
+        assert self.search(admin_client, 'lic', search_mode='prefix') == []
+        assert self.search(admin_client, '%', search_mode='prefix') == []
+
+    def test_03_rename(self, admin_client, users):
+        bob = User.objects.get(username='Bob')
+        bob.username = 'Robert'
+        bob.save(update_fields=('username',))
+        assert self.search(
+            admin_client, 'rob', search_mode='prefix'
+        ) == ['Robert'], (
+            'Проверьте, что после смены имени поиск находит новое имя.'
+        )
+        assert self.search(admin_client, 'obe') == ['Robert']
+        assert self.search(admin_client, 'bob') == []
+
+    def test_04_prefix_uses_index(self, admin_client, users):
+        with CaptureQueriesContext(connection) as context:
+            admin_client.get(self.URL, {'search': 'al',
+                                        'search_mode': 'prefix'})
+        page_query = context.captured_queries[-1]['sql']
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {page_query}')
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        assert 'username_lower' in plan and 'TEMP B-TREE' not in plan, (
+            'Проверьте, что поиск по началу имени выбирает строки и порядок '
+            f'по индексу нормализованного имени: {plan}'
+        )
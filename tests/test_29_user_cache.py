@@ -0,0 +1,96 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.cache import USERS_VERSION_KEY, bump_version
+from reviews.models import Comment, Review, User
+from reviews.user_cache import LRUCache, user_cache
+
+
+@pytest.mark.django_db
+class Test29UserCache:
+
+    @pytest.fixture
+    def review(self, user, title, make_authors):
+        review = None
+        for author in make_authors(3):
+            review = Review.objects.create(title=title, author=author,
+                                           text='Отзыв', score=5)
+            Comment.objects.create(review=review, author=author,
+                                   text='Комментарий')
+        return review
+
+    def get_urls(self, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        return (url, f'{url}{review.pk}/', f'{url}{review.pk}/comments/')
+
+    def test_01_no_user_queries(self, client, review):
+        for url in self.get_urls(review):
+            client.get(url)
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.status_code == 200
+            # Скрытые авторы исключаются подзапросом, столбцы пользователей
+            # не читаются.
+            assert not [
+                query for query in context.captured_queries
+                if '"reviews_user".' in query['sql']
+            ], (
+                f'Проверьте, что `{url}` выводит авторов из кеша '
+                'пользователей без JOIN и без запроса к пользователям.'
+            )
+
+    def test_02_rename(self, client, review):
+        url = self.get_urls(review)[0]
+        client.get(url)
+        author = review.author
+        author.username = 'renamed'
+        author.save()
+        assert 'renamed' in {
+            item['author'] for item in client.get(url).json()['results']
+        }, 'Проверьте, что смена имени пользователя сбрасывает кеш.'
+
+    def test_03_other_process_change(self, client, review):
+        url = self.get_urls(review)[0]
+        client.get(url)
+        # Изменение в другом процессе: сигналы здесь не срабатывают,
+        # но версия пользователей в общем кеше растёт.
+        User.objects.filter(pk=review.author_id).update(username='remote')
+        bump_version(USERS_VERSION_KEY)
+        assert 'remote' in {
+            item['author'] for item in client.get(url).json()['results']
+        }, (
+            'Проверьте, что кеш пользователей сбрасывается при смене версии '
+            'пользователей в общем кеше.'
+        )
+
+    def test_04_lru(self):
+        cache = LRUCache(max_size=2, timeout=60)
+        cache.set(1, 'a')
+        cache.set(2, 'b')
+        assert cache.get(1) == 'a'
+        cache.set(3, 'c')
+        assert cache.get(2) is None, (
+            'Проверьте, что вытесняется давно не использованная запись.'
+        )
+        assert cache.get(1) == 'a' and cache.get(3) == 'c'
+        stats = cache.stats()
+        assert (stats['size'], stats['hits'], stats['misses']) == (2, 3, 1)
+        assert stats['hit_rate'] == 0.75
+
+    def test_05_stats(self, client, admin_client, user_client, review):
+        url = self.get_urls(review)[0]
+        user_cache.entries.clear()
+        client.get(url)
+        client.get(url)
+        response = admin_client.get('/api/v1/users/cache-stats/')
+        assert response.status_code == 200
+        stats = response.json()['users']
+        assert stats['hits'] > 0 and stats['misses'] > 0, (
+            'Проверьте, что `/api/v1/users/cache-stats/` возвращает '
+            'статистику попаданий в кеш пользователей.'
+        )
+        assert 0 < stats['hit_rate'] < 1
+        assert user_client.get(
+            '/api/v1/users/cache-stats/'
+        ).status_code == 403
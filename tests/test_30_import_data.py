@@ -0,0 +1,134 @@
+import csv
+import shutil
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
+from django.db.models.query import QuerySet
+
+from reviews.importing import get_load_order
+from reviews.management.commands.import_data import Command
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+@pytest.mark.django_db
+class Test30ImportData:
+    DATA_DIR = settings.BASE_DIR / 'static' / 'data'
+
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        shutil.copytree(self.DATA_DIR, tmp_path, dirs_exist_ok=True)
+        return tmp_path
+
+    def count_rows(self, path):
+        with open(path, encoding='utf-8') as csv_file:
+            return sum(1 for _ in csv.DictReader(csv_file))
+
+    def dump(self):
+        return {
+            model: list(model.objects.order_by('pk').values_list(
+                *(field.attname for field in model._meta.concrete_fields
+                  if field.attname not in (
+                      'pub_date', 'date_joined', 'last_comment_at',
+                      'reviews_version', 'comments_version'
+                  ))
+            )) for model in Command.csv_tables
+        }
+
+    def test_01_batches(self, data_dir, monkeypatch):
+        batches = []
+        original = QuerySet.bulk_create
+
+        def bulk_create(queryset, objs, *args, **kwargs):
+            objs = list(objs)
+            batches.append((queryset.model, len(objs)))
+            return original(queryset, objs, *args, **kwargs)
+
+        monkeypatch.setattr(QuerySet, 'bulk_create', bulk_create)
+        out = StringIO()
+        call_command('import_data', data_dir=data_dir, batch_size=10,
+                     stdout=out)
+        # Пересчёт рейтингов после загрузки пишет свои таблицы.
+        batches = [
+            (model, size) for model, size in batches
+            if model in Command.csv_tables
+        ]
+        assert batches and max(size for _, size in batches) <= 10, (
+            'Проверьте, что `import_data` записывает строки порциями не '
+            'больше `--batch-size`.'
+        )
+        assert [size for model, size in batches if model is Review] == [
+            10
+        ] * 7 + [2]
+        assert Review.objects.count() == self.count_rows(
+            data_dir / 'review.csv'
+        )
+        assert Comment.objects.count() and User.objects.count()
+        assert 'строк/с' in out.getvalue(), (
+            'Проверьте, что `import_data` сообщает скорость загрузки '
+            'таблиц.'
+        )
+
+    def test_02_ratings(self, data_dir):
+        call_command('import_data', data_dir=data_dir, stdout=StringIO())
+        title = Title.objects.filter(rating_count__gt=0).first()
+        assert title.rating_count == Review.objects.filter(
+            title=title
+        ).count(), (
+            'Проверьте, что после загрузки рейтинги произведений '
+            'пересчитаны.'
+        )
+
+    def test_03_load_order(self):
+        assert [set(level) for level in get_load_order(
+            Command.csv_tables
+        )] == [
+            {Category, Genre, User}, {Title},
+            {Review, Title.genre.through}, {Comment}
+        ], (
+            'Проверьте, что таблицы загружаются по уровням графа '
+            'зависимостей по внешним ключам.'
+        )
+
+    def test_04_parallel(self, data_dir):
+        call_command('import_data', data_dir=data_dir, batch_size=10,
+                     stdout=StringIO())
+        sequential = self.dump()
+        for model in reversed(Command.csv_tables):
+            model.objects.all().delete()
+        out = StringIO()
+        call_command('import_data', data_dir=data_dir, batch_size=10,
+                     workers=2, stdout=out)
+        assert self.dump() == sequential, (
+            'Проверьте, что параллельная загрузка даёт те же данные, что '
+            'и последовательная.'
+        )
+        assert User.objects.filter(username_lower='bingobongo').exists()
+        assert 'строк/с' in out.getvalue()
+
+    @pytest.mark.parametrize('options', (
+        {'batch_size': 0}, {'batch_size': -1}, {'workers': 0}
+    ))
+    def test_05_invalid_options(self, data_dir, options):
+        with pytest.raises(CommandError):
+            call_command('import_data', data_dir=data_dir, stdout=StringIO(),
+                         **options)
+
+    def test_06_table_atomic(self, data_dir):
+        path = data_dir / 'review.csv'
+        with open(path, encoding='utf-8', newline='') as csv_file:
+            row = list(csv.reader(csv_file))[1]
+        # Строка с уже занятым id в последней порции.
+        with open(path, 'a', encoding='utf-8', newline='') as csv_file:
+            csv_file.write('\n')
+            csv.writer(csv_file).writerow(row)
+        with pytest.raises(IntegrityError):
+            call_command('import_data', data_dir=data_dir, batch_size=10,
+                         stdout=StringIO())
+        assert not Review.objects.exists(), (
+            'Проверьте, что таблица загружается одной транзакцией и при '
+            'ошибке в ней не остаётся части строк.'
+        )
+        assert Title.objects.exists()
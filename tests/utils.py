@@ -1,4 +1,7 @@
 from http import HTTPStatus
+from multiprocessing import get_context
+
+from django.db import connections
 
 
 check_name_and_slug_patterns = (
@@ -305,3 +308,24 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def run_in_other_process(func, *args, **kwargs):
+    """Выполняет func в отдельном процессе: его локальные кеши не связаны
+    с кешами этого процесса, общими остаются только БД и кеш версий.
+    """
+    process = get_context('fork').Process(
+        target=run_with_own_connections, args=(func, *args), kwargs=kwargs
+    )
+    process.start()
+    process.join()
+    assert process.exitcode == 0, (
+        'Изменение в другом процессе завершилось ошибкой.'
+    )
+
+
+def run_with_own_connections(func, *args, **kwargs):
+    # Соединения с БД, унаследованные от родительского процесса, не
+    # используются: процесс открывает свои.
+    connections.close_all()
+    func(*args, **kwargs)